@@ -0,0 +1,47 @@
+"""角色继承与闭包表
+
+Revision ID: 4f7b2c9e8a13
+Revises: d3e1a7c52b90
+Create Date: 2026-10-18 16:45:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f7b2c9e8a13'
+down_revision: Union[str, Sequence[str], None] = 'd3e1a7c52b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rbac_role_parent',
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('parent_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['parent_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['role_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('role_id', 'parent_id')
+    )
+    op.create_table('rbac_role_closure',
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.Column('ancestor_id', sa.Integer(), nullable=False),
+    sa.Column('depth', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['ancestor_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['role_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('role_id', 'ancestor_id')
+    )
+    op.create_index('idx_role_closure_ancestor', 'rbac_role_closure', ['ancestor_id', 'role_id'], unique=False)
+    # 现有角色没有继承关系，闭包只有自身一行
+    op.execute("INSERT INTO rbac_role_closure (role_id, ancestor_id, depth) SELECT id, id, 0 FROM rbac_roles WHERE deleted_at IS NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_role_closure_ancestor', table_name='rbac_role_closure')
+    op.drop_table('rbac_role_closure')
+    op.drop_table('rbac_role_parent')
@@ -0,0 +1,29 @@
+"""部门路径前缀索引
+
+Revision ID: 7e2d4b9c1f58
+Revises: a5c8e3d1f247
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2d4b9c1f58'
+down_revision: Union[str, Sequence[str], None] = 'a5c8e3d1f247'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('idx_rbac_departments_path_pattern', 'rbac_departments', ['path'], unique=False, postgresql_ops={'path': 'varchar_pattern_ops'})
+    op.create_index('idx_user_department_department', 'rbac_user_department', ['department_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_user_department_department', table_name='rbac_user_department')
+    op.drop_index('idx_rbac_departments_path_pattern', table_name='rbac_departments')
@@ -0,0 +1,34 @@
+"""部门角色授权
+
+Revision ID: a5c8e3d1f247
+Revises: 4f7b2c9e8a13
+Create Date: 2026-10-18 17:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5c8e3d1f247'
+down_revision: Union[str, Sequence[str], None] = '4f7b2c9e8a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rbac_department_role',
+    sa.Column('department_id', sa.BigInteger(), nullable=False),
+    sa.Column('role_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['department_id'], ['rbac_departments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['role_id'], ['rbac_roles.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('department_id', 'role_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rbac_department_role')
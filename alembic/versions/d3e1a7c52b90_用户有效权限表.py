@@ -0,0 +1,48 @@
+"""用户有效权限表
+
+Revision ID: d3e1a7c52b90
+Revises: b11caf345d0f
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e1a7c52b90'
+down_revision: Union[str, Sequence[str], None] = 'b11caf345d0f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rbac_user_effective_permission',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('permission_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['permission_id'], ['rbac_permissions.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['rbac_users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'permission_id')
+    )
+    op.create_index('idx_user_effective_permission_permission', 'rbac_user_effective_permission', ['permission_id', 'user_id'], unique=False)
+    # 根据现有的角色权限数据填充
+    op.execute(
+        """
+        INSERT INTO rbac_user_effective_permission (user_id, permission_id)
+        SELECT DISTINCT ur.user_id, rp.permission_id
+        FROM rbac_user_role ur
+        JOIN rbac_users u ON u.id = ur.user_id AND u.deleted_at IS NULL
+        JOIN rbac_roles r ON r.id = ur.role_id AND r.deleted_at IS NULL
+        JOIN rbac_role_permission rp ON rp.role_id = r.id
+        JOIN rbac_permissions p ON p.id = rp.permission_id AND p.deleted_at IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_user_effective_permission_permission', table_name='rbac_user_effective_permission')
+    op.drop_table('rbac_user_effective_permission')
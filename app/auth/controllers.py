@@ -1,15 +1,20 @@
+import hashlib
+import json
 from datetime import timedelta
 from logging import getLogger
 
+from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.core.exception_handler import AppException
+from app.core.response_cache import etag_matches
+from app.core.route_matcher import route_matcher
 from app.core.security import create_access_token, get_password_hash, verify_password
-from app.rbac_core import user_service
+from app.rbac_core import rbac, user_service
 
-from .schemas import LoginRequest, RegisterRequest, Token
+from .schemas import LoginRequest, PermissionCheckRequest, PermissionCheckResult, RegisterRequest, Token
 
 logger = getLogger(__name__)
 
@@ -44,3 +49,28 @@ async def register(db: AsyncSession, data: RegisterRequest) -> JSONResponse:
     logger.info(f"用户 {data.username} 注册成功")
 
     return JSONResponse(status_code=201, content={"detail": "用户注册成功"})
+
+
+async def check_permissions(db: AsyncSession, user_id: int, data: PermissionCheckRequest) -> PermissionCheckResult:
+    """批量检查当前用户的权限，具体请求路径会先解析为路由模板"""
+    apis = [(item.method, route_matcher.match(item.path, item.method) or item.path) for item in data.apis]
+    names, api_results = await rbac.check_user_permissions(db, user_id, data.names, apis)
+    return PermissionCheckResult(names=names, apis=api_results)
+
+
+async def get_route_manifest(db: AsyncSession, user_id: int, request: Request) -> Response:
+    """
+    返回当前用户可以访问的路由模板，按HTTP方法分组
+    响应带 ETag，内容没有变化时返回 304
+    """
+    is_superadmin, apis = await rbac.get_user_api_routes(db, user_id)
+    routes: dict[str, list[str]] = {}
+    for method, path in sorted(apis):
+        routes.setdefault(method, []).append(path)
+    body = json.dumps({"superadmin": is_superadmin, "routes": routes}, ensure_ascii=False, separators=(",", ":"))
+    etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth import controllers, schemas
-from app.core.depends import db_depends
+from app.core.depends import current_user_depends, db_depends
+from app.rbac_core.user.models import User
 
 from .schemas import RegisterRequest
 
@@ -21,3 +22,15 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSessi
 async def register(user_in: RegisterRequest, db: AsyncSession = db_depends):
     """公开注册端点，允许创建新用户"""
     return await controllers.register(db, user_in)
+
+
+@router.post("/permissions/check", response_model=schemas.PermissionCheckResult, summary="批量检查权限", description="一次检查多个权限名称或API，返回与请求顺序一致的结果")
+async def check_permissions(data: schemas.PermissionCheckRequest, db: AsyncSession = db_depends, current_user: User = current_user_depends):
+    """批量检查当前用户的权限"""
+    return await controllers.check_permissions(db, current_user.id, data)
+
+
+@router.get("/routes", summary="当前用户可访问的路由", description="返回当前用户可以访问的全部路由模板，支持 If-None-Match 协商缓存")
+async def get_route_manifest(request: Request, db: AsyncSession = db_depends, current_user: User = current_user_depends):
+    """当前用户可访问的路由"""
+    return await controllers.get_route_manifest(db, current_user.id, request)
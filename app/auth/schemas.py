@@ -14,3 +14,22 @@ class LoginRequest(BaseModel):
 class RegisterRequest(BaseModel):
     username: str = Field(..., description="用户名")
     password: str = Field(..., description="密码")
+
+
+class ApiCheckItem(BaseModel):
+    method: str = Field(..., description="HTTP方法")
+    path: str = Field(..., description="路由模板或具体请求路径，如 /rbac/users/{user_id} 或 /rbac/users/42")
+
+
+class PermissionCheckRequest(BaseModel):
+    """批量权限检查请求"""
+
+    names: list[str] = Field(default_factory=list, max_length=500, description="权限名称列表")
+    apis: list[ApiCheckItem] = Field(default_factory=list, max_length=500, description="API列表")
+
+
+class PermissionCheckResult(BaseModel):
+    """批量权限检查结果，与请求中的顺序一一对应"""
+
+    names: list[bool] = Field(..., description="权限名称检查结果")
+    apis: list[bool] = Field(..., description="API检查结果")
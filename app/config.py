@@ -11,6 +11,26 @@ class Settings(BaseSettings):
     SUPER_ADMIN_USERNAME: str = "admin"
     SUPER_ADMIN_PASSWORD: str = "admin"
 
+    # 缓存后端：memory(进程内)、local(本机多进程，CACHE_URL为SQLite文件路径)、redis(CACHE_URL为redis://地址)
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = ""
+
+    # 授权缓存容量（估算字节数），角色缓存随角色数增长，用户缓存随活跃用户数增长
+    RBAC_ROLE_CACHE_BYTES: int = 32 * 1024 * 1024
+    RBAC_USER_CACHE_BYTES: int = 64 * 1024 * 1024
+    # 进程内授权缓存的最长存活时间（秒），版本号失效之外的兜底：
+    # memory 后端的版本号只在本进程内递增，多 worker 部署时其他进程的变更最迟在该时间后生效
+    RBAC_CACHE_TTL_SECONDS: int = 60 * 60
+    # 按权限裁剪后的菜单树缓存容量（响应体字节数）
+    RBAC_MENU_CACHE_BYTES: int = 8 * 1024 * 1024
+    # 服务端响应缓存容量（原始及压缩后响应体的字节数）
+    RESPONSE_CACHE_BYTES: int = 32 * 1024 * 1024
+    # 服务端响应缓存的最长存活时间（秒）：memory 后端的数据版本号只在本进程内递增，
+    # 多 worker 部署时其他进程的写操作最迟在该时间后反映到响应和 ETag 上
+    RESPONSE_CACHE_TTL_SECONDS: int = 5 * 60
+    # 跨进程共享授权快照的文件路径，为空时不启用，各 worker 使用进程内缓存
+    RBAC_SNAPSHOT_PATH: str = ""
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,328 @@
+"""
+异步缓存后端
+授权缓存和后续的响应缓存都通过 CacheBackend 协议访问缓存，具体后端由配置决定：
+    memory  进程内缓存，默认值，值按引用保存，调用方不能修改取出的值
+    local   本机多进程共享，基于 SQLite(WAL) 文件，CACHE_URL 为文件路径
+    redis   多节点共享，使用 Redis 协议(RESP)，CACHE_URL 形如 redis://:password@host:6379/0
+
+共享后端的值使用 JSON 序列化，元组取出后会变成列表
+版本号计数器与普通的键值分开保存且不设置过期时间，使用 Redis 时淘汰策略不能是 allkeys-*，
+否则计数器被淘汰后可能让过期的缓存重新生效
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Protocol, Sequence
+from urllib.parse import urlparse
+
+from cachetools import LRUCache
+
+from app.config import settings
+
+
+class CacheError(Exception):
+    """缓存后端返回错误"""
+
+
+class CacheBackend(Protocol):
+    # 是否在多个进程之间共享，进程内后端不需要再保存一份二级缓存
+    shared: bool
+
+    async def get(self, key: str) -> Any | None: ...
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]: ...
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def version(self, *keys: str) -> tuple[int, ...]:
+        """读取版本号计数器，不存在的计数器为0"""
+        ...
+
+    async def bump(self, *keys: str) -> None:
+        """版本号计数器加1"""
+        ...
+
+
+class MemoryCache:
+    """
+    进程内缓存，按条目数淘汰，版本号计数器不淘汰
+    """
+
+    shared = False
+
+    def __init__(self, maxsize: int = 100_000):
+        # key -> (过期时间, value)
+        self._data = LRUCache(maxsize=maxsize)
+        self._versions: dict[str, int] = {}
+
+    def _get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def get(self, key: str) -> Any | None:
+        return self._get(key)
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        self._data[key] = (None if ttl is None else time.monotonic() + ttl, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def version(self, *keys: str) -> tuple[int, ...]:
+        versions = self._versions
+        return tuple(versions.get(key, 0) for key in keys)
+
+    async def bump(self, *keys: str) -> None:
+        versions = self._versions
+        for key in keys:
+            versions[key] = versions.get(key, 0) + 1
+
+
+class LocalCache:
+    """
+    本机多进程共享缓存，所有 worker 读写同一个 SQLite 文件
+    SQLite 调用在线程池中执行，不阻塞事件循环
+    """
+
+    shared = True
+    # 每写入多少次清理一次过期条目
+    _PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_versions (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        return conn
+
+    def _run(self, func, *args):
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            return func(self._conn, *args)
+
+    async def _call(self, func, *args):
+        try:
+            return await asyncio.to_thread(self._run, func, *args)
+        except sqlite3.Error as exc:
+            raise CacheError(str(exc)) from exc
+
+    @staticmethod
+    def _placeholders(count: int) -> str:
+        return ",".join("?" * count)
+
+    def _get_many(self, conn: sqlite3.Connection, keys: Sequence[str]) -> list[Any | None]:
+        if not keys:
+            return []
+        now = time.time()
+        rows = conn.execute(f"SELECT key, value, expires_at FROM cache_entries WHERE key IN ({self._placeholders(len(keys))})", list(keys)).fetchall()
+        found = {key: json.loads(value) for key, value, expires_at in rows if expires_at is None or expires_at > now}
+        return [found.get(key) for key in keys]
+
+    def _set(self, conn: sqlite3.Connection, key: str, value: Any, ttl: int | None) -> None:
+        expires_at = None if ttl is None else time.time() + ttl
+        conn.execute("INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)", (key, json.dumps(value), expires_at))
+        self._writes += 1
+        if self._writes % self._PURGE_EVERY == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def _delete(self, conn: sqlite3.Connection, keys: Sequence[str]) -> None:
+        conn.execute(f"DELETE FROM cache_entries WHERE key IN ({self._placeholders(len(keys))})", list(keys))
+
+    def _version(self, conn: sqlite3.Connection, keys: Sequence[str]) -> tuple[int, ...]:
+        rows = conn.execute(f"SELECT key, value FROM cache_versions WHERE key IN ({self._placeholders(len(keys))})", list(keys)).fetchall()
+        found = dict(rows)
+        return tuple(found.get(key, 0) for key in keys)
+
+    def _bump(self, conn: sqlite3.Connection, keys: Sequence[str]) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO cache_versions (key, value) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET value = value + 1",
+                [(key,) for key in keys],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def get(self, key: str) -> Any | None:
+        return (await self._call(self._get_many, [key]))[0]
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        return await self._call(self._get_many, keys)
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        await self._call(self._set, key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._call(self._delete, keys)
+
+    async def version(self, *keys: str) -> tuple[int, ...]:
+        if not keys:
+            return ()
+        return await self._call(self._version, keys)
+
+    async def bump(self, *keys: str) -> None:
+        if keys:
+            await self._call(self._bump, keys)
+
+
+class RedisCache:
+    """
+    Redis 协议(RESP)缓存，只实现用到的少量命令，任何兼容 RESP 的服务端都可以使用
+    每个进程一条连接，命令按顺序发送，多条命令使用管道一次发送
+    """
+
+    shared = True
+
+    def __init__(self, url: str):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _encode(args: Sequence[Any]) -> bytes:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(f"${len(data)}\r\n".encode())
+            parts.append(data)
+            parts.append(b"\r\n")
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        reader = self._reader
+        assert reader is not None
+        line = await reader.readuntil(b"\r\n")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            # 错误响应作为返回值，由 _send 读完整个管道的响应后再抛出，避免连接上残留未读的响应
+            return CacheError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length == -1:
+                return None
+            return [await self._read_reply() for _ in range(length)]
+        raise CacheError(f"无法解析的响应: {line!r}")
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._send([("AUTH", self.password)])
+        if self.db:
+            await self._send([("SELECT", self.db)])
+
+    async def _send(self, commands: Sequence[Sequence[Any]]) -> list[Any]:
+        writer = self._writer
+        assert writer is not None
+        writer.write(b"".join(self._encode(command) for command in commands))
+        await writer.drain()
+        replies = [await self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, CacheError):
+                raise reply
+        return replies
+
+    def _reset(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def _execute(self, *commands: Sequence[Any]) -> list[Any]:
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await self._connect()
+                return await self._send(commands)
+            except BaseException as exc:
+                # 任何异常（包括任务被取消、命令返回错误）之后都无法确定连接上是否还有未读的响应，
+                # 继续使用会读到其他命令的响应，关闭连接，下次重新连接
+                self._reset()
+                if isinstance(exc, (OSError, asyncio.IncompleteReadError)):
+                    raise CacheError(f"Redis连接失败: {exc}") from exc
+                raise
+
+    async def get(self, key: str) -> Any | None:
+        (value,) = await self._execute(("GET", key))
+        return None if value is None else json.loads(value)
+
+    async def get_many(self, keys: Sequence[str]) -> list[Any | None]:
+        if not keys:
+            return []
+        (values,) = await self._execute(("MGET", *keys))
+        return [None if value is None else json.loads(value) for value in values]
+
+    async def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        command: tuple = ("SET", key, json.dumps(value))
+        if ttl is not None:
+            command += ("EX", ttl)
+        await self._execute(command)
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._execute(("DEL", *keys))
+
+    async def version(self, *keys: str) -> tuple[int, ...]:
+        if not keys:
+            return ()
+        (values,) = await self._execute(("MGET", *keys))
+        return tuple(0 if value is None else int(value) for value in values)
+
+    async def bump(self, *keys: str) -> None:
+        if keys:
+            await self._execute(*(("INCR", key) for key in keys))
+
+
+def create_cache(backend: str, url: str = "") -> CacheBackend:
+    """
+    根据配置创建缓存后端
+    """
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "local":
+        return LocalCache(url or "cache.sqlite3")
+    if backend == "redis":
+        return RedisCache(url or "redis://localhost:6379/0")
+    raise ValueError(f"不支持的缓存后端: {backend}")
+
+
+cache = create_cache(settings.CACHE_BACKEND, settings.CACHE_URL)
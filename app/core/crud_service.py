@@ -1,13 +1,14 @@
 from datetime import datetime, timezone
 from logging import getLogger
-from typing import Any, Generic, Sequence, Type, TypeVar
+from typing import Any, Generic, Iterable, Mapping, Sequence, Type, TypeVar
 
-from fastapi import status
-from sqlalchemy import Select, delete, insert, inspect, select, update
+from sqlalchemy import Select, bindparam, delete, insert, inspect, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.data_scope import DataScope, ScopeFilter
 from app.core.database import DBBaseModel
 from app.core.exception_handler import AppException
+from app.core.filters import FilterCompiler
 
 logger = getLogger(__name__)
 
@@ -15,13 +16,43 @@ logger = getLogger(__name__)
 DBModelType = TypeVar("DBModelType", bound=DBBaseModel)
 
 
+def _unique_keys(model) -> list[str]:
+    """
+    模型的主键和单列唯一键（唯一约束、唯一索引）对应的字段名
+    """
+    mapper = inspect(model)
+    keys = {column: key for key, column in mapper.columns.items()}
+    columns = [*mapper.primary_key, *(c for c in model.__table__.columns if c.unique)]
+    for index in model.__table__.indexes:
+        if index.unique and len(index.columns) == 1:
+            columns.extend(index.columns)
+    return list(dict.fromkeys(keys[c] for c in columns if c in keys))
+
+
 class CRUDService(Generic[DBModelType]):
     """
     基础 CRUD 服务类，返回 ORM 实例
+    scope_filter: 模型的数据范围条件，传入 scope 的查询会追加该条件
+    filter_operators: 按字段限制可用的过滤运算符，默认按字段类型确定
     """
 
-    def __init__(self, model: Type[DBModelType]):
+    def __init__(self, model: Type[DBModelType], scope_filter: ScopeFilter | None = None, filter_operators: Mapping[str, Iterable[str]] | None = None):
         self.model = model
+        self.scope_filter = scope_filter
+        # 过滤条件编译表，每个服务实例构建一次
+        self.filters = FilterCompiler(model, filter_operators)
+        # 主键、唯一键的单行查询语句，值通过绑定参数传入，每次查询不再重新构建语句
+        self._lookup_stmts = {key: select(model).where(self.filters.columns[key] == bindparam("value")) for key in _unique_keys(model)}
+
+    def _scope_to_expr(self, scope: DataScope | None) -> list:
+        """
+        将数据范围转换为 SQLAlchemy 表达式列表，不受限时为空
+        """
+        if scope is None or scope.unrestricted:
+            return []
+        if self.scope_filter is None:
+            raise AppException(status_code=500, detail=f"{self.model.__name__} 未定义数据范围")
+        return [self.scope_filter(scope)]
 
     def _dict_to_expr(self, **filters):
         """
@@ -29,97 +60,46 @@ class CRUDService(Generic[DBModelType]):
         """
         if not filters:
             return []
+        return self.filters.compile(**filters)
 
-        exprs = []
-        supported_actions = {"contains", "icontains", "startswith", "endswith", "eq", "ne", "gt", "ge", "lt", "le", "in", "not_in", "is_null", "between"}
-
-        mapper = inspect(self.model)
-        columns = {c.key: c for c in mapper.attrs}
-
-        for raw_field, value in filters.items():
-            if "__" in raw_field:
-                field, action = raw_field.split("__", 1)
-            else:
-                field, action = raw_field, "eq"
-
-            if action not in supported_actions:
-                raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不支持的过滤运算符: {action}")
-            if field not in columns:
-                raise AppException(status_code=status.HTTP_404_NOT_FOUND, detail=f"不存在的过滤字段: {field}")
-
-            col = getattr(self.model, field)
-
-            # 字符串类型运算符
-            if action == "contains":
-                expr = col.like(f"%{value}%")
-            elif action == "icontains":
-                expr = col.ilike(f"%{value}%")
-            elif action == "startswith":
-                expr = col.like(f"{value}%")
-            elif action == "endswith":
-                expr = col.like(f"%{value}")
-            # 基础比较
-            elif action == "eq":
-                expr = col.is_(None) if value is None else col == value
-            elif action == "ne":
-                expr = col.is_not(None) if value is None else col != value
-            elif action == "gt":
-                expr = col > value
-            elif action == "ge":
-                expr = col >= value
-            elif action == "lt":
-                expr = col < value
-            elif action == "le":
-                expr = col <= value
-            # 集合比较
-            elif action == "in":
-                if not isinstance(value, (list, tuple, set)):
-                    raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field}__in 需要列表")
-                expr = col.in_(value)
-            elif action == "not_in":
-                if not isinstance(value, (list, tuple, set)):
-                    raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field}__not_in 需要列表")
-                expr = ~col.in_(value)
-            # 空值判断
-            elif action == "is_null":
-                if not isinstance(value, bool):
-                    raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field}__is_null 需要布尔值")
-                expr = col.is_(None) if value else col.is_not(None)
-            # 区间判断
-            elif action == "between":
-                if not isinstance(value, (list, tuple)) or len(value) != 2:
-                    raise AppException(400, f"{field}__between 需要两个值")
-                expr = col.between(value[0], value[1])
-            else:
-                expr = None
-
-            if expr is not None:
-                exprs.append(expr)
-        return exprs
-
-    def get_select_stmt(self, options: list[Any] | None = None, **filters) -> Select:
-        """
-        根据过滤条件构建查询语句
+    def get_select_stmt(self, options: list[Any] | None = None, scope: DataScope | None = None, **filters) -> Select:
+        """
+        根据过滤条件和数据范围构建查询语句
         """
         stmt = select(self.model)
-        exprs = self._dict_to_expr(**filters)
+        exprs = self._dict_to_expr(**filters) + self._scope_to_expr(scope)
         if exprs:
             stmt = stmt.where(*exprs)
         if options:
             stmt = stmt.options(*options)
         return stmt
 
-    # ------------------ 单条 CRUD ------------------
-    async def get_by_id(self, db: AsyncSession, id: int, options: list[Any] | None = None) -> DBModelType | None:
-        stmt = self.get_select_stmt(options=options, id=id)
-        result = await db.execute(stmt)
+    async def _lookup(self, db: AsyncSession, key: str, value: Any, options: list[Any] | None = None, scope: DataScope | None = None) -> DBModelType | None:
+        """
+        使用预先构建的语句按主键或唯一键查询单条记录
+        """
+        stmt = self._lookup_stmts[key]
+        if options:
+            stmt = stmt.options(*options)
+        if exprs := self._scope_to_expr(scope):
+            stmt = stmt.where(*exprs)
+        result = await db.execute(stmt, {"value": value})
         return result.scalar_one_or_none()
 
-    async def get_or_none(self, db: AsyncSession, options: list[Any] | None = None, **filters) -> DBModelType | None:
+    # ------------------ 单条 CRUD ------------------
+    async def get_by_id(self, db: AsyncSession, id: int, options: list[Any] | None = None, scope: DataScope | None = None) -> DBModelType | None:
+        return await self._lookup(db, "id", id, options=options, scope=scope)
+
+    async def get_or_none(self, db: AsyncSession, options: list[Any] | None = None, scope: DataScope | None = None, **filters) -> DBModelType | None:
         """
         根据条件获取单条记录，如果不存在返回 None
+        只有一个主键或唯一键的等值条件时使用预先构建的语句
         """
-        stmt = self.get_select_stmt(options=options, **filters)
+        if len(filters) == 1:
+            ((key, value),) = filters.items()
+            if key in self._lookup_stmts and value is not None:
+                return await self._lookup(db, key, value, options=options, scope=scope)
+        stmt = self.get_select_stmt(options=options, scope=scope, **filters)
         result = await db.execute(stmt)
         return result.scalar_one_or_none()
 
@@ -135,11 +115,11 @@ class CRUDService(Generic[DBModelType]):
         data = {**filters, **defaults}
         return await self.create(db, data, commit=commit)
 
-    async def list_by_filter(self, db: AsyncSession, options: list[Any] | None = None, **filters) -> Sequence[DBModelType]:
+    async def list_by_filter(self, db: AsyncSession, options: list[Any] | None = None, scope: DataScope | None = None, **filters) -> Sequence[DBModelType]:
         """
         根据条件查询多条记录
         """
-        stmt = self.get_select_stmt(options=options, **filters)
+        stmt = self.get_select_stmt(options=options, scope=scope, **filters)
         logger.info(f"stmt: {stmt}")
         result = await db.execute(stmt)
         return result.scalars().all()
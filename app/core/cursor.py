@@ -0,0 +1,50 @@
+"""
+游标分页的游标编解码
+游标记录排序字段、上一页最后一行的排序字段值和主键，对客户端不透明
+"""
+
+import base64
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+from app.core.exception_handler import AppException
+
+
+def _default(value: Any) -> str:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"不支持的游标值类型: {type(value).__name__}")
+
+
+def _coerce(value: Any, python_type: type) -> Any:
+    if value is None or isinstance(value, python_type):
+        return value
+    if python_type in (datetime, date, time):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(order_by: str, value: Any, id: int) -> str:
+    data = json.dumps([order_by, value, id], default=_default, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str, order_by: str, python_type: type) -> tuple[Any, int]:
+    """
+    解析游标，返回 (排序字段值, 主键)，游标无效或与排序字段不一致时抛出 400
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_order_by, value, id = json.loads(data)
+    except (ValueError, TypeError):
+        raise AppException(400, "无效的游标")
+    if cursor_order_by != order_by:
+        raise AppException(400, "游标与排序字段不一致")
+    try:
+        return _coerce(value, python_type), int(id)
+    except (ValueError, TypeError):
+        raise AppException(400, "无效的游标")
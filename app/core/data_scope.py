@@ -0,0 +1,43 @@
+"""
+行级数据范围
+按部门子树限制可以访问的数据，QueryService/CRUDService 将其转换为 SQL 条件，在分页之前过滤
+"""
+
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import ColumnElement, false, or_
+
+
+@dataclass(frozen=True, slots=True)
+class DataScope:
+    """
+    数据范围，department_paths 为可访问的部门子树根路径（如 /1/3/），unrestricted 为 True 时不限制
+    """
+
+    user_id: int
+    department_paths: tuple[str, ...] = ()
+    unrestricted: bool = False
+
+    @staticmethod
+    def collapse(paths: tuple[str, ...] | list[str]) -> tuple[str, ...]:
+        """
+        去掉被其他路径包含的子路径，/1/ 已经覆盖 /1/3/
+        """
+        result: list[str] = []
+        for path in sorted(set(paths)):
+            if not result or not path.startswith(result[-1]):
+                result.append(path)
+        return tuple(result)
+
+    def path_condition(self, column) -> ColumnElement[bool]:
+        """
+        部门路径的前缀匹配条件，使用完整的 LIKE 模式（'/1/3/%'），可以利用路径上的前缀索引
+        """
+        if not self.department_paths:
+            return false()
+        return or_(*(column.like(f"{path}%") for path in self.department_paths))
+
+
+# 模型的数据范围条件构造函数
+ScopeFilter = Callable[[DataScope], ColumnElement[bool]]
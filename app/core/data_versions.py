@@ -0,0 +1,112 @@
+"""
+表数据版本号
+每张表一个版本号计数器，保存在缓存后端中，多个进程、多个节点共享。
+会话记录事务中写过的表（ORM flush、通过会话执行的 INSERT/UPDATE/DELETE 语句），
+提交成功后递增这些表的版本号，回滚则丢弃；响应缓存等以版本号判断缓存是否有效
+"""
+
+import asyncio
+from logging import getLogger
+from typing import Iterable
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, attributes
+
+from app.core.cache import CacheBackend, cache
+
+logger = getLogger(__name__)
+
+# session.info 中记录本次事务写过的表名
+_PENDING_KEY = "data_versions.pending"
+# 提交后递增版本号失败时的重试间隔（秒），超过次数后按最后一个间隔一直重试
+_RETRY_DELAYS = (0.1, 0.5, 2, 5, 30)
+
+
+def _version_key(table: str) -> str:
+    return f"data:v:{table}"
+
+
+class DataVersions:
+    __slots__ = ("cache", "_failed", "_retrier")
+
+    def __init__(self, cache: CacheBackend):
+        self.cache = cache
+        # 递增失败、等待重试的表
+        self._failed: set[str] = set()
+        self._retrier: asyncio.Task | None = None
+
+    async def current(self, *tables: str) -> tuple[int, ...]:
+        """
+        一次读取多张表的当前版本号
+        """
+        return await self.cache.version(*(_version_key(table) for table in tables))
+
+    async def bump(self, *tables: str) -> None:
+        await self.cache.bump(*(_version_key(table) for table in tables))
+
+    async def bump_committed(self, session: Session) -> None:
+        """
+        会话提交后调用，递增本次事务写过的表的版本号
+        事务已经提交，这里不抛出异常：缓存后端出错时记录日志，在后台重试直到成功
+        """
+        tables = session.info.pop(_PENDING_KEY, None)
+        if not tables:
+            return
+        try:
+            await self.bump(*sorted(tables))
+        except Exception as exc:
+            logger.error(f"递增数据版本号失败，稍后重试: {sorted(tables)}: {exc}")
+            self._failed.update(tables)
+            if self._retrier is None or self._retrier.done():
+                self._retrier = asyncio.get_running_loop().create_task(self._retry())
+
+    async def _retry(self) -> None:
+        attempt = 0
+        while self._failed:
+            await asyncio.sleep(_RETRY_DELAYS[min(attempt, len(_RETRY_DELAYS) - 1)])
+            tables, self._failed = self._failed, set()
+            try:
+                await self.bump(*sorted(tables))
+                logger.info(f"数据版本号重试递增成功: {sorted(tables)}")
+                attempt = 0
+            except Exception as exc:
+                self._failed.update(tables)
+                attempt += 1
+                logger.error(f"递增数据版本号第{attempt}次重试失败: {sorted(tables)}: {exc}")
+
+
+data_versions = DataVersions(cache)
+
+
+def _record(session: Session, tables: Iterable[str]) -> None:
+    session.info.setdefault(_PENDING_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session: Session, flush_context) -> None:
+    """
+    ORM flush 写入的表，包括多对多关系的关联表
+    """
+    tables: set[str] = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        mapper = inspect(obj).mapper
+        tables.update(table.name for table in mapper.tables)
+        for relationship in mapper.relationships:
+            if relationship.secondary is not None and attributes.get_history(obj, relationship.key).has_changes():
+                tables.add(relationship.secondary.name)
+    if tables:
+        _record(session, tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_statement(execute_state) -> None:
+    """
+    通过会话执行的 INSERT/UPDATE/DELETE 语句（批量更新、关联表写入等）
+    """
+    if execute_state.is_insert or execute_state.is_update or execute_state.is_delete:
+        _record(execute_state.session, [execute_state.statement.table.name])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
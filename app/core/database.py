@@ -1,10 +1,12 @@
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
 from sqlalchemy import DateTime, event
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column, with_loader_criteria
 
 from app.config import settings
+from app.core.data_versions import data_versions
+from app.core.schemas import LOCAL_TZ
 
 # 创建异步数据库引擎
 engine = create_async_engine(
@@ -14,8 +16,19 @@ engine = create_async_engine(
     # connect_args={"init_command": "SET time_zone = '+8:00'"},
 )
 
+class VersionedAsyncSession(AsyncSession):
+    """
+    提交成功后递增本次事务写过的表的数据版本号，见 app/core/data_versions.py
+    递增失败不会使 commit 抛出异常，由 data_versions 在后台重试
+    """
+
+    async def commit(self) -> None:
+        await super().commit()
+        await data_versions.bump_committed(self.sync_session)
+
+
 # 创建异步会话工厂
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+AsyncSessionLocal = async_sessionmaker(engine, class_=VersionedAsyncSession, expire_on_commit=False)
 
 
 # 创建基础类
@@ -38,12 +51,12 @@ class DBBaseModel(Base):
     @property
     def created_at_local(self) -> datetime:
         """返回本地时间"""
-        return self.created_at.astimezone(timezone(timedelta(hours=8)))
+        return self.created_at.astimezone(LOCAL_TZ)
 
     @property
     def updated_at_local(self) -> datetime:
         """返回本地时间"""
-        return self.updated_at.astimezone(timezone(timedelta(hours=8)))
+        return self.updated_at.astimezone(LOCAL_TZ)
 
     def soft_delete(self):
         self.deleted_at = datetime.now(timezone.utc)
@@ -6,7 +6,9 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
+from app.core.data_scope import DataScope
 from app.core.database import AsyncSessionLocal
+from app.core.route_matcher import route_matcher
 from app.core.schemas import PaginationParams
 from app.rbac_core import rbac
 from app.rbac_core.user.models import User
@@ -63,8 +65,8 @@ async def require_permission(request: Request, current_user: User = Depends(get_
     """
     权限依赖项，用于检查当前用户是否有指定权限
     """
-    # 获取当前路由和方法
-    api_path = request.url.path
+    # 获取当前路由模板和方法，如 /rbac/users/42 解析为 /rbac/users/{user_id}
+    api_path = route_matcher.resolve(request)
     api_method = request.method
 
     # 检查用户是否有指定权限
@@ -91,6 +93,16 @@ def api_permission_depends(permission_name: str, db: AsyncSession = Depends(get_
     return _checker
 
 
+# ======================================================
+# 数据范围依赖项
+# ======================================================
+async def get_data_scope(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> DataScope:
+    """
+    当前用户的数据范围，列表接口传给 QueryService 在分页之前过滤
+    """
+    return await rbac.get_data_scope(db, current_user.id)
+
+
 # ======================================================
 # 所有依赖进行组合
 # ======================================================
@@ -104,6 +116,9 @@ current_user_depends: User = Depends(get_current_user)
 # 分页依赖项
 pagination_params_depends: PaginationParams = Depends(get_pagination_params)
 
+# 数据范围依赖项
+data_scope_depends: DataScope = Depends(get_data_scope)
+
 # 权限依赖项
 # 自动检查当前用户是否有访问当前路由的权限
 default_permission_depends = Depends(require_permission)
@@ -0,0 +1,151 @@
+"""
+过滤条件编译
+每个模型在创建服务时构建一次 FilterCompiler：按字段类型确定可用的运算符，
+生成 "字段__运算符" -> 表达式工厂 的只读表，请求中只需查表调用，不再反射模型、拆分字符串
+"""
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Mapping
+
+from fastapi import status
+from sqlalchemy import ColumnElement, inspect
+
+from app.core.exception_handler import AppException
+
+FilterFactory = Callable[[Any], ColumnElement[bool]]
+
+SUPPORTED_OPERATORS = frozenset({"contains", "icontains", "startswith", "endswith", "eq", "ne", "gt", "ge", "lt", "le", "in", "not_in", "is_null", "between"})
+# 按字段类型默认开放的运算符
+_STRING_OPERATORS = SUPPORTED_OPERATORS
+_ORDERED_OPERATORS = frozenset({"eq", "ne", "gt", "ge", "lt", "le", "in", "not_in", "is_null", "between"})
+_BOOL_OPERATORS = frozenset({"eq", "ne", "is_null"})
+_DEFAULT_OPERATORS = frozenset({"eq", "ne", "in", "not_in", "is_null"})
+
+
+def _default_operators(column) -> frozenset[str]:
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return _DEFAULT_OPERATORS
+    if issubclass(python_type, str):
+        return _STRING_OPERATORS
+    if issubclass(python_type, bool):
+        return _BOOL_OPERATORS
+    if issubclass(python_type, (int, float, Decimal, datetime, date, time)):
+        return _ORDERED_OPERATORS
+    return _DEFAULT_OPERATORS
+
+
+def _require_list(field: str, action: str) -> None:
+    raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field}__{action} 需要列表")
+
+
+def _make_factory(col, field: str, action: str) -> FilterFactory:
+    if action == "contains":
+        return lambda value: col.like(f"%{value}%")
+    if action == "icontains":
+        return lambda value: col.ilike(f"%{value}%")
+    if action == "startswith":
+        return lambda value: col.like(f"{value}%")
+    if action == "endswith":
+        return lambda value: col.like(f"%{value}")
+    if action == "eq":
+        return lambda value: col.is_(None) if value is None else col == value
+    if action == "ne":
+        return lambda value: col.is_not(None) if value is None else col != value
+    if action == "gt":
+        return lambda value: col > value
+    if action == "ge":
+        return lambda value: col >= value
+    if action == "lt":
+        return lambda value: col < value
+    if action == "le":
+        return lambda value: col <= value
+    if action == "in":
+
+        def in_(value):
+            if not isinstance(value, (list, tuple, set)):
+                _require_list(field, action)
+            return col.in_(value)
+
+        return in_
+    if action == "not_in":
+
+        def not_in(value):
+            if not isinstance(value, (list, tuple, set)):
+                _require_list(field, action)
+            return ~col.in_(value)
+
+        return not_in
+    if action == "is_null":
+
+        def is_null(value):
+            if not isinstance(value, bool):
+                raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field}__is_null 需要布尔值")
+            return col.is_(None) if value else col.is_not(None)
+
+        return is_null
+    if action == "between":
+
+        def between(value):
+            if not isinstance(value, (list, tuple)) or len(value) != 2:
+                raise AppException(400, f"{field}__between 需要两个值")
+            return col.between(value[0], value[1])
+
+        return between
+    raise ValueError(f"不支持的过滤运算符: {action}")
+
+
+class FilterCompiler:
+    """
+    模型的过滤条件编译表
+    operators: 按字段指定允许的运算符，覆盖按字段类型确定的默认值
+    """
+
+    __slots__ = ("model", "columns", "factories")
+
+    def __init__(self, model, operators: Mapping[str, Iterable[str]] | None = None):
+        self.model = model
+        operators = operators or {}
+        mapper = inspect(model)
+        # 字段名 -> 模型属性，只包含列，不包含关系
+        self.columns = MappingProxyType({key: getattr(model, key) for key in mapper.columns.keys()})
+
+        factories: dict[str, FilterFactory] = {}
+        for field, col in self.columns.items():
+            allowed = frozenset(operators[field]) if field in operators else _default_operators(mapper.columns[field])
+            if unknown := allowed - SUPPORTED_OPERATORS:
+                raise ValueError(f"{model.__name__}.{field} 不支持的过滤运算符: {sorted(unknown)}")
+            for action in allowed:
+                factory = _make_factory(col, field, action)
+                factories[f"{field}__{action}"] = factory
+                if action == "eq":
+                    factories[field] = factory
+        self.factories = MappingProxyType(factories)
+
+    def compile(self, **filters) -> list[ColumnElement[bool]]:
+        """
+        将过滤字典转换为 SQLAlchemy 表达式列表
+        """
+        factories = self.factories
+        exprs = []
+        for raw_field, value in filters.items():
+            factory = factories.get(raw_field)
+            if factory is None:
+                self._reject(raw_field)
+            exprs.append(factory(value))
+        return exprs
+
+    def _reject(self, raw_field: str) -> None:
+        """
+        不在编译表中的过滤条件，给出具体原因
+        """
+        field, _, action = raw_field.partition("__")
+        action = action or "eq"
+        if action not in SUPPORTED_OPERATORS:
+            raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"不支持的过滤运算符: {action}")
+        if field not in self.columns:
+            raise AppException(status_code=status.HTTP_404_NOT_FOUND, detail=f"不存在的过滤字段: {field}")
+        raise AppException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"字段 {field} 不支持运算符 {action}")
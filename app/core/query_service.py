@@ -1,15 +1,42 @@
-from typing import Any, Generic, List, Type, TypeVar, Union
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Generic, Iterable, List, Mapping, Sequence, Type, TypeVar, Union
 
-from pydantic import BaseModel
-from sqlalchemy import func, select
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import Select, Table, func, literal, select, text, tuple_
+from sqlalchemy.exc import CompileError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.inspection import inspect
+from sqlalchemy.sql.util import find_tables
 
+from app.core.cache import cache
 from app.core.crud_service import CRUDService, DBModelType
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.data_scope import DataScope, ScopeFilter
+from app.core.data_versions import data_versions
 from app.core.exception_handler import AppException
-from app.core.schemas import PaginatedResult
+from app.core.schemas import PaginatedResult, TotalMode
 
 SchemaType = TypeVar("SchemaType", bound=BaseModel)
+# total_mode="cached" 时 count 结果在缓存后端中的过期时间（秒），只用于回收，有效性由数据版本号判断
+COUNT_CACHE_TTL = 3600
+
+
+@lru_cache(maxsize=64)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    """
+    schema 的列表校验器，一次校验整页数据
+    """
+    return TypeAdapter(list[schema])
+
+
+@lru_cache(maxsize=256)
+def _fields_adapter(schema: Type[BaseModel], fields: tuple[str, ...]) -> TypeAdapter:
+    """
+    由 schema 的部分字段组成的模型列表校验器，按 (schema, 字段) 缓存，字段定义和配置与 schema 相同
+    """
+    partial = create_model(f"{schema.__name__}Fields", __config__=ConfigDict(**schema.model_config), **{f: (schema.model_fields[f].annotation, schema.model_fields[f]) for f in fields})
+    return TypeAdapter(list[partial])
 
 
 class QueryService(Generic[DBModelType, SchemaType]):
@@ -17,26 +44,33 @@ class QueryService(Generic[DBModelType, SchemaType]):
     高级查询服务，专注 API 层
     """
 
-    def __init__(self, model: Type[DBModelType], schema: Type[SchemaType] | None = None):
+    def __init__(
+        self,
+        model: Type[DBModelType],
+        schema: Type[SchemaType] | None = None,
+        scope_filter: ScopeFilter | None = None,
+        filter_operators: Mapping[str, Iterable[str]] | None = None,
+    ):
         self.model = model
         self.read_schema = schema
-        self.crud: CRUDService[DBModelType] = CRUDService(model)
+        self.crud: CRUDService[DBModelType] = CRUDService(model, scope_filter, filter_operators)
+        # read_schema 中对应模型列的字段，paginate 的 fields 只能从中选择
+        self._readable_fields = frozenset(schema.model_fields) & self.crud.filters.columns.keys() if schema else frozenset()
 
-    def _dict_to_expr(self, **filters):
-        # 复用 CRUDService 的过滤方法
-        return self.crud._dict_to_expr(**filters)
+    def _dict_to_expr(self, scope: DataScope | None = None, **filters):
+        # 复用 CRUDService 的过滤方法，数据范围条件与过滤条件一起在分页之前生效
+        return self.crud._dict_to_expr(**filters) + self.crud._scope_to_expr(scope)
 
-    async def list_values(self, db: AsyncSession, *, fields: list[str], flat: bool = False, **filters) -> Union[List[Any], List[dict]]:
+    async def list_values(self, db: AsyncSession, *, fields: list[str], flat: bool = False, scope: DataScope | None = None, **filters) -> Union[List[Any], List[dict]]:
         if not fields:
             raise AppException(400, "fields 不能为空")
-        mapper = inspect(self.model)
-        columns = {c.key: c for c in mapper.attrs}
+        columns = self.crud.filters.columns
         invalid = set(fields) - columns.keys()
         if invalid:
             raise AppException(400, f"不存在的字段: {list(invalid)}")
 
-        stmt = select(*(getattr(self.model, f) for f in fields))
-        exprs = self._dict_to_expr(**filters)
+        stmt = select(*(columns[f] for f in fields))
+        exprs = self._dict_to_expr(scope, **filters)
         if exprs:
             stmt = stmt.where(*exprs)
 
@@ -50,43 +84,212 @@ class QueryService(Generic[DBModelType, SchemaType]):
 
         return [dict(zip(fields, row)) for row in rows]
 
-    async def paginate(self, db: AsyncSession, *, page: int = 1, size: int = 10, order_by=None, options: list[Any] | None = None, **filters) -> PaginatedResult[SchemaType]:
+    def _order_column(self, order_by: str):
+        """
+        解析排序字段，"-" 前缀表示降序，返回 (字段, 是否降序)
+        """
+        descending = order_by.startswith("-")
+        field_name = order_by[1:] if descending else order_by
+        # 判断是否存在该字段
+        column = self.crud.filters.columns.get(field_name)
+        if column is None:
+            raise AppException(400, f"不存在的排序字段: {field_name}")
+        return column, descending
+
+    async def paginate(
+        self,
+        db: AsyncSession,
+        *,
+        page: int = 1,
+        size: int = 10,
+        order_by=None,
+        cursor: str | None = None,
+        total_mode: TotalMode = "exact",
+        options: list[Any] | None = None,
+        scope: DataScope | None = None,
+        fields: str | Sequence[str] | None = None,
+        **filters,
+    ) -> PaginatedResult[SchemaType]:
+        """
+        分页查询
+        cursor 为 None 时按页码分页（OFFSET）；传入游标时按游标分页，空字符串表示第一页，
+        游标分页按 order_by 字段加主键排序，从上一页最后一行之后开始查询，翻页深度不影响查询耗时，
+        翻页期间插入的数据也不会导致重复或遗漏
+        total_mode 为总数的计算方式：
+            exact      单独执行一次 count 查询
+            window     在分页查询中附带 count(*) OVER ()，一次往返同时得到数据和总数；
+                       页为空时无法得到总数，第一页为 0，其他页退回 exact；游标分页的条件会影响窗口计数，也退回 exact
+            estimated  PostgreSQL 上读取查询计划的估算行数，其他数据库退回 exact
+            cached     按查询条件缓存 count 结果，涉及的表有写入（数据版本号变化）后重新查询
+            none       不查询总数，total 为 None，只返回 has_next
+        estimated、cached、none 的 has_next 通过多查一行判断，不依赖可能不准确的总数
+        fields 为返回的字段（列表或逗号分隔的字符串），只能是 read_schema 中对应模型列的字段：
+            传入时只查询这些列，不创建 ORM 实例、不加载关联数据，options 不生效，
+            items 为只包含这些字段的模型实例，不符合 read_schema，路由需要直接序列化（见 paginated_response）
+        """
         if self.read_schema is None:
             raise AppException(500, "分页查询需要定义read_schema")
 
-        page = max(page, 1)
-        offset = (page - 1) * size
-
-        stmt = select(self.model)
-        exprs = self._dict_to_expr(**filters)
+        if isinstance(fields, str):
+            fields = [f for f in (f.strip() for f in fields.split(",")) if f]
+        if fields:
+            fields = tuple(dict.fromkeys(fields))
+            if invalid := set(fields) - self._readable_fields:
+                raise AppException(400, f"不支持的返回字段: {sorted(invalid)}")
+            columns = self.crud.filters.columns
+            # 主键和排序字段用于游标，总是查询，校验时忽略不需要的字段
+            selected = dict.fromkeys([*fields, "id"])
+            if cursor is not None and order_by:
+                selected[order_by.lstrip("-")] = None
+            stmt = select(*(columns[f] for f in selected if f in columns))
+        else:
+            stmt = select(self.model)
+            if options:
+                stmt = stmt.options(*options)
+        exprs = self._dict_to_expr(scope, **filters)
         if exprs:
             stmt = stmt.where(*exprs)
-        if options:
-            stmt = stmt.options(*options)
-        if order_by:
-            if order_by.startswith("-"):
-                order_by_field_name = order_by[1:]
-                order_action = "desc"
-            else:
-                order_by_field_name = order_by
-                order_action = "asc"
-            # 判断是否存在该字段
-            if not hasattr(self.model, order_by_field_name):
-                raise AppException(400, f"不存在的排序字段: {order_by_field_name}")
-            if order_action == "desc":
-                order_by = getattr(self.model, order_by_field_name).desc()
+
+        next_cursor = None
+        total = None
+        if cursor is not None:
+            order_by = order_by or "id"
+            stmt, seek = self._seek(stmt, order_by, cursor)
+            # 多查一行判断是否还有下一页
+            items = await self._fetch(db, stmt.where(*seek).limit(size + 1), fields)
+            has_next = len(items) > size
+            items = items[:size]
+            if has_next:
+                column, _ = self._order_column(order_by)
+                last = items[-1]
+                next_cursor = encode_cursor(order_by, getattr(last, column.key), last.id)
+        else:
+            page = max(page, 1)
+            offset = (page - 1) * size
+            if order_by:
+                column, descending = self._order_column(order_by)
+                stmt = stmt.order_by(column.desc() if descending else column.asc())
+            stmt = stmt.offset(offset)
+            if total_mode == "window":
+                rows = (await db.execute(stmt.limit(size).add_columns(func.count().over()))).all()
+                items = [row if fields else row[0] for row in rows]
+                if rows:
+                    total = rows[0][-1]
+                elif offset == 0:
+                    total = 0
+            elif total_mode == "exact":
+                items = await self._fetch(db, stmt.limit(size), fields)
             else:
-                order_by = getattr(self.model, order_by_field_name).asc()
-            stmt = stmt.order_by(order_by)
-        stmt = stmt.offset(offset).limit(size)
+                # 不查询总数，或总数是估算值、可能落后的缓存值时，多查一行判断是否还有下一页
+                items = await self._fetch(db, stmt.limit(size + 1), fields)
+                has_next = len(items) > size
+                items = items[:size]
+        if fields:
+            # 一次校验整页的行，多查询的主键、排序字段、窗口计数不在模型中，被忽略
+            schema_items = _fields_adapter(self.read_schema, fields).validate_python([row._asdict() for row in items])
+        else:
+            schema_items = _list_adapter(self.read_schema).validate_python(items, from_attributes=True)
+
+        if total is None and total_mode != "none":
+            total = await self._total(db, exprs, total_mode)
+        if cursor is None and total_mode in ("exact", "window"):
+            has_next = offset + len(items) < total
+
+        return PaginatedResult(items=schema_items, total=total, has_next=has_next, next_cursor=next_cursor)
 
+    @staticmethod
+    async def _fetch(db: AsyncSession, stmt: Select, fields: Sequence[str] | None) -> list:
+        """
+        查询实体时返回 ORM 实例，按字段查询时返回 Row
+        """
         result = await db.execute(stmt)
-        items = result.scalars().all()
-        schema_items = [self.read_schema.model_validate(item) for item in items]
+        return list(result.all() if fields else result.scalars().all())
 
+    async def _total(self, db: AsyncSession, exprs: list, total_mode: TotalMode) -> int:
+        if total_mode == "estimated" and db.bind.dialect.name == "postgresql":
+            estimated = await self._estimate_count(db, exprs)
+            if estimated is not None:
+                return estimated
+        if total_mode == "cached":
+            return await self._cached_count(db, exprs)
+        return await self._count(db, exprs)
+
+    def _count_stmt(self, exprs: list) -> Select:
         count_stmt = select(func.count(self.model.id))
         if exprs:
             count_stmt = count_stmt.where(*exprs)
+        return count_stmt
+
+    async def _count(self, db: AsyncSession, exprs: list) -> int:
+        return (await db.execute(self._count_stmt(exprs))).scalar_one()
+
+    async def _estimate_count(self, db: AsyncSession, exprs: list) -> int | None:
+        """
+        PostgreSQL 估算行数：没有过滤条件且表没有软删除字段时读取 pg_class.reltuples，否则读取 EXPLAIN 的 Plan Rows
+        （reltuples 包含已软删除的行）
+        统计信息不可用（表未 ANALYZE）或条件无法渲染为字面量时返回 None，由调用方退回 exact
+        """
+        soft_delete = hasattr(self.model, "deleted_at")
+        if not exprs and not soft_delete:
+            stmt = text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)")
+            reltuples = (await db.execute(stmt, {"table": self.model.__tablename__})).scalar_one_or_none()
+            return reltuples if reltuples is not None and reltuples >= 0 else None
+
+        # 手动编译的语句不经过软删除钩子，这里显式加上条件
+        stmt = select(self.model.id).where(*exprs)
+        if soft_delete:
+            stmt = stmt.where(self.model.deleted_at.is_(None))
+        try:
+            sql = str(stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+        except (CompileError, NotImplementedError):
+            return None
+        conn = await db.connection()
+        plan = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}")).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+    async def _cached_count(self, db: AsyncSession, exprs: list) -> int:
+        """
+        count 结果按 (查询语句, 参数) 缓存在缓存后端中，同时记录语句涉及的所有表的数据版本号，
+        版本号在查询前读取，查询期间发生的写入会使本次结果失效
+        """
+        count_stmt = self._count_stmt(exprs)
+        compiled = count_stmt.compile(dialect=db.bind.dialect)
+        fingerprint = hashlib.sha1(f"{compiled}|{sorted(compiled.params.items())!r}".encode("utf-8")).hexdigest()
+        key = f"count:{self.model.__tablename__}:{fingerprint}"
+        tables = sorted({t.name for t in find_tables(count_stmt, check_columns=True) if isinstance(t, Table)})
+        versions = list(await data_versions.current(*tables))
+
+        cached = await cache.get(key)
+        if cached is not None and cached["v"] == versions:
+            return cached["n"]
         total = (await db.execute(count_stmt)).scalar_one()
+        await cache.set(key, {"v": versions, "n": total}, ttl=COUNT_CACHE_TTL)
+        return total
+
+    def _seek(self, stmt: Select, order_by: str, cursor: str) -> tuple[Select, list]:
+        """
+        游标分页：按 (排序字段, 主键) 排序，返回排序后的语句和从游标位置开始的条件
+        """
+        column, descending = self._order_column(order_by)
+        pk = self.model.id
+        if column.key != pk.key and column.nullable:
+            raise AppException(400, f"游标分页不支持可以为空的排序字段: {column.key}")
+        ordering = [column.desc() if descending else column.asc()]
+        if column.key != pk.key:
+            ordering.append(pk.desc() if descending else pk.asc())
+        stmt = stmt.order_by(*ordering)
+        if not cursor:
+            return stmt, []
 
-        return PaginatedResult(items=schema_items, total=total)
+        try:
+            python_type = column.type.python_type
+        except NotImplementedError:
+            python_type = str
+        value, last_id = decode_cursor(cursor, order_by, python_type)
+        if column.key == pk.key:
+            return stmt, [pk < last_id if descending else pk > last_id]
+        # 行值比较 (col, id) > (:value, :id)，可以使用 (col, id) 上的联合索引
+        key, last = tuple_(column, pk), tuple_(literal(value, column.type), literal(last_id, pk.type))
+        return stmt, [key < last if descending else key > last]
@@ -0,0 +1,121 @@
+"""
+服务端响应缓存
+适用于很少变化、对所有用户相同的读接口（菜单树、部门树等），路由按需使用：
+    return await response_cache.respond(request, tables=["rbac_menus"], build=...)
+缓存以 (路径, 查询参数, 依赖表的数据版本号) 为 key，ETag 由 key 计算，
+If-None-Match 命中时只读取一次版本号就返回 304，不访问数据库也不构建响应体
+数据版本号不跨进程共享（memory 后端）时，key 还包含按 ttl 划分的时间段，其他进程的写操作最迟 ttl 后生效
+响应体预先压缩保存，按 Accept-Encoding 返回 br（安装了 brotli 时）、gzip 或原始内容
+"""
+
+import gzip
+import hashlib
+import time
+from typing import Awaitable, Callable, NamedTuple, Sequence
+
+from cachetools import TTLCache
+from fastapi import Request, Response
+
+from app.config import settings
+from app.core.data_versions import DataVersions, data_versions
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只提供 gzip
+    brotli = None
+
+# 小于该字节数的响应体不压缩
+_MIN_COMPRESS_SIZE = 512
+
+
+class CachedBody(NamedTuple):
+    identity: bytes
+    gzip: bytes | None
+    br: bytes | None
+    media_type: str
+
+
+def sizeof_cached_body(body: CachedBody) -> int:
+    return len(body.identity) + len(body.gzip or b"") + len(body.br or b"") + 200
+
+
+def _accepted_encodings(request: Request) -> set[str]:
+    """
+    解析 Accept-Encoding，忽略 q=0 的编码
+    """
+    encodings = set()
+    for item in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = item.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(name.lower())
+    return encodings
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    If-None-Match 是否与 ETag 匹配，支持多个 ETag、弱 ETag(W/) 和 *
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in header.split(","))
+
+
+class ResponseCache:
+    def __init__(self, versions: DataVersions, maxsize: int, ttl: int):
+        self.versions = versions
+        self.ttl = ttl
+        # key为ETag, value为CachedBody
+        self._bodies = TTLCache(maxsize=maxsize, ttl=ttl, getsizeof=sizeof_cached_body)
+
+    @staticmethod
+    def _compress(body: bytes, media_type: str) -> CachedBody:
+        if len(body) < _MIN_COMPRESS_SIZE:
+            return CachedBody(body, None, None, media_type)
+        return CachedBody(
+            identity=body,
+            gzip=gzip.compress(body, compresslevel=6, mtime=0),
+            br=brotli.compress(body) if brotli is not None else None,
+            media_type=media_type,
+        )
+
+    async def respond(
+        self,
+        request: Request,
+        *,
+        tables: Sequence[str],
+        build: Callable[[], Awaitable[bytes]],
+        media_type: str = "application/json",
+        vary: str = "",
+    ) -> Response:
+        """
+        返回缓存的响应，未命中时调用 build 构建响应体
+        tables: 响应依赖的表，任何一张表的数据版本号变化后缓存失效
+        vary: 响应还依赖的其他条件（如用户权限指纹），计入缓存 key
+        """
+        versions = await self.versions.current(*tables)
+        key = f"{request.url.path}?{request.url.query}|{vary}|{','.join(f'{t}:{v}' for t, v in zip(tables, versions))}"
+        if not self.versions.cache.shared:
+            # 版本号看不到其他进程的写操作，使用墙上时钟划分时间段，各 worker 在同一时间段内的 ETag 仍然一致
+            key += f"|t:{int(time.time() // self.ttl)}"
+        etag = f'"{hashlib.sha1(key.encode("utf-8")).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+
+        cached: CachedBody | None = self._bodies.get(etag)
+        if cached is None:
+            cached = self._compress(await build(), media_type)
+            self._bodies[etag] = cached
+
+        encodings = _accepted_encodings(request)
+        if cached.br is not None and "br" in encodings:
+            headers["Content-Encoding"] = "br"
+            return Response(content=cached.br, media_type=cached.media_type, headers=headers)
+        if cached.gzip is not None and "gzip" in encodings:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=cached.gzip, media_type=cached.media_type, headers=headers)
+        return Response(content=cached.identity, media_type=cached.media_type, headers=headers)
+
+
+response_cache = ResponseCache(data_versions, settings.RESPONSE_CACHE_BYTES, settings.RESPONSE_CACHE_TTL_SECONDS)
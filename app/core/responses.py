@@ -0,0 +1,26 @@
+"""
+响应类和不经过路由 response_model 的响应
+"""
+
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.schemas import PaginatedResult
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:  # orjson 是项目依赖，没有按依赖安装时退回标准库 json
+    from fastapi.responses import JSONResponse as DefaultJSONResponse
+
+_paginated_adapter = TypeAdapter(PaginatedResult[Any])
+
+
+def paginated_response(result: PaginatedResult) -> Response:
+    """
+    直接序列化分页结果，items 按各自的模型序列化
+    用于 paginate 指定了 fields 的情况，此时 items 只包含部分字段，不符合路由的 response_model
+    """
+    return Response(content=_paginated_adapter.dump_json(result), media_type="application/json")
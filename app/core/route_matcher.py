@@ -0,0 +1,97 @@
+from typing import Iterable
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+from starlette.routing import BaseRoute
+
+
+class _Node:
+    __slots__ = ("children", "param", "catch_all", "templates")
+
+    def __init__(self):
+        # 字面量路径段 -> 子节点
+        self.children: dict[str, "_Node"] = {}
+        # 路径参数子节点，如 {user_id}
+        self.param: "_Node | None" = None
+        # 匹配剩余所有路径段的参数，如 {file_path:path}
+        self.catch_all: dict[str, str] = {}
+        # HTTP方法 -> 路由模板
+        self.templates: dict[str, str] = {}
+
+
+class RouteMatcher:
+    """
+    路由模板匹配器
+    应用启动时根据 FastAPI 路由表按路径段构建前缀树，将具体请求路径（/rbac/users/42）
+    解析为路由模板（/rbac/users/{user_id}），权限表只需为每个路由模板保存一条记录
+    """
+
+    def __init__(self):
+        self._root = _Node()
+
+    def build(self, routes: Iterable[BaseRoute]) -> None:
+        """
+        根据路由表构建前缀树，重复调用会重新构建
+        """
+        root = _Node()
+        for route in routes:
+            if not isinstance(route, APIRoute):
+                continue
+            for method in route.methods:
+                self._insert(root, route.path, method)
+        self._root = root
+
+    @staticmethod
+    def _insert(root: _Node, template: str, method: str) -> None:
+        node = root
+        for segment in template.strip("/").split("/"):
+            if segment.startswith("{") and segment.endswith("}"):
+                if segment.endswith(":path}"):
+                    node.catch_all[method] = template
+                    return
+                node.param = node.param or _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(segment, _Node())
+        # 区分 /users 和 /users/
+        if template.endswith("/") and template != "/":
+            node = node.children.setdefault("", _Node())
+        node.templates[method] = template
+
+    def match(self, api_path: str, api_method: str) -> str | None:
+        """
+        将具体请求路径解析为路由模板，找不到时返回 None
+        字面量路径段优先于路径参数，与 FastAPI 按注册顺序匹配的结果一致
+        """
+        segments = api_path.strip("/").split("/")
+        if api_path.endswith("/") and api_path != "/":
+            segments.append("")
+        return self._match(self._root, segments, 0, api_method.upper())
+
+    def _match(self, node: _Node, segments: list[str], index: int, method: str) -> str | None:
+        if index == len(segments):
+            return node.templates.get(method)
+        if method in node.catch_all:
+            return node.catch_all[method]
+        child = node.children.get(segments[index])
+        if child is not None:
+            template = self._match(child, segments, index + 1, method)
+            if template is not None:
+                return template
+        if node.param is not None and segments[index]:
+            return self._match(node.param, segments, index + 1, method)
+        return None
+
+    def resolve(self, request: Request) -> str:
+        """
+        获取当前请求对应的路由模板
+        路由阶段已经匹配过的 APIRoute 直接取其模板，其他情况再走前缀树，最后回退到原始路径
+        """
+        route = request.scope.get("route")
+        if isinstance(route, APIRoute):
+            return route.path
+        api_path = request.url.path
+        return self.match(api_path, request.method) or api_path
+
+
+route_matcher = RouteMatcher()
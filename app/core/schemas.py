@@ -1,16 +1,23 @@
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Generic, TypeVar
+from typing import Annotated, Generic, Literal, TypeVar
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PlainSerializer
+
+# 东八区
+LOCAL_TZ = timezone(timedelta(hours=8))
 
 
 def handle_datetime(v: datetime) -> str:
     """
     处理 datetime 类型, 转换为东八区时间, 格式为 "%Y-%m-%d %H:%M:%S"
     """
-    v = v.astimezone(timezone(timedelta(hours=8)))
-    return v.strftime("%Y-%m-%d %H:%M:%S")
+    # isoformat 比 strftime 快，截取到秒，去掉时区后缀
+    return v.astimezone(LOCAL_TZ).isoformat(" ", "seconds")[:19]
+
+
+# 输出 JSON 时格式化为东八区时间的 datetime
+LocalDateTime = Annotated[datetime, PlainSerializer(handle_datetime, return_type=str, when_used="json")]
 
 
 class BaseSchema(BaseModel):
@@ -19,14 +26,16 @@ class BaseSchema(BaseModel):
     """
 
     id: int = Field(..., description="主键ID")
-    created_at: datetime = Field(..., description="创建时间")
-    updated_at: datetime = Field(..., description="更新时间")
-    deleted_at: datetime | None = Field(None, description="删除时间")
+    created_at: LocalDateTime = Field(..., description="创建时间")
+    updated_at: LocalDateTime = Field(..., description="更新时间")
+    deleted_at: LocalDateTime | None = Field(None, description="删除时间")
 
-    model_config = {"from_attributes": True, "json_encoders": {datetime: handle_datetime}}
+    model_config = {"from_attributes": True}
 
 
 SchemaType = TypeVar("SchemaType", bound=BaseModel)
+# 分页总数的计算方式，见 QueryService.paginate
+TotalMode = Literal["exact", "window", "estimated", "cached", "none"]
 
 
 class PaginationParams(BaseModel):
@@ -37,6 +46,9 @@ class PaginationParams(BaseModel):
     page: int = Field(default=0, description="页码")
     size: int = Field(default=20, description="每页数量")
     order_by: str = Field("id", description="排序字段")
+    cursor: str | None = Field(None, description="游标，传入时按游标分页并忽略页码，空字符串表示第一页")
+    total_mode: TotalMode = Field("exact", description="总数计算方式：exact 单独查询总数，window 与分页数据在同一次查询中返回，estimated 估算，cached 缓存，none 不返回总数")
+    fields: str | None = Field(None, description="返回的字段，逗号分隔，传入时只查询这些字段，不返回关联数据")
 
 
 @dataclass
@@ -45,5 +57,10 @@ class PaginatedResult(Generic[SchemaType]):
     分页结果
     """
 
-    total: int
+    # total_mode 为 none 时为 None
+    total: int | None
     items: list[SchemaType]
+    # 是否还有下一页
+    has_next: bool | None = None
+    # 游标分页时下一页的游标，没有下一页时为 None
+    next_cursor: str | None = None
@@ -0,0 +1,58 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from logging import getLogger
+from typing import Any, TypeVar
+
+logger = getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    并发请求合并
+    同一个key同时只有一个协程真正执行，其余并发调用等待同一个Future并共享结果，
+    执行出错时异常会传递给所有等待者
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+        # 被合并的等待次数，即省掉的重复执行次数
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                return await self._lead(key, func)
+
+            self.coalesced += 1
+            logger.info(f"合并并发请求 {self.name}:{key}，累计合并{self.coalesced}次")
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # 执行者被取消而当前协程没有被取消时，重新竞争执行
+                task = asyncio.current_task()
+                if future.cancelled() and task is not None and not task.cancelling():
+                    continue
+                raise
+
+    async def _lead(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # 标记异常已被获取，没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._calls.pop(key, None)
@@ -0,0 +1,142 @@
+"""
+树形数据工具
+由 (id, parent_id) 行一次遍历构建树，剪枝和序列化都使用显式栈，不递归，
+树的深度不受递归深度限制，节点为普通 dict，不创建 Pydantic 对象
+"""
+
+import json
+from typing import Any, Callable, Iterable, Iterator, Mapping
+
+Node = dict[str, Any]
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_END = object()
+
+
+def build_tree(
+    rows: Iterable[Mapping[str, Any]],
+    *,
+    id_key: str = "id",
+    parent_key: str = "parent_id",
+    children_key: str = "children",
+    sort_key: str | None = None,
+) -> list[Node]:
+    """
+    由扁平的行构建树，返回根节点列表
+    parent_key 为 None 的行为根节点，父节点不存在（已删除）的行连同其子树一起丢弃
+    sort_key: 同级节点的排序字段，值相同时按 id 排序，为 None 时保持行的顺序
+    没有子节点的节点不包含 children_key
+    """
+    nodes: dict[Any, Node] = {}
+    parents: list[tuple[Node, Any]] = []
+    for row in rows:
+        node = dict(row)
+        nodes[node[id_key]] = node
+        parents.append((node, node.get(parent_key)))
+
+    roots: list[Node] = []
+    for node, parent_id in parents:
+        if parent_id is None:
+            roots.append(node)
+        elif (parent := nodes.get(parent_id)) is not None:
+            parent.setdefault(children_key, []).append(node)
+
+    if sort_key is not None:
+
+        def key(node: Node):
+            return (node.get(sort_key) or 0, node[id_key])
+
+        roots.sort(key=key)
+        for node in nodes.values():
+            if children_key in node:
+                node[children_key].sort(key=key)
+    return roots
+
+
+def prune_tree(
+    roots: list[Node],
+    include: Callable[[Node], bool],
+    *,
+    children_key: str = "children",
+    drop_empty: Callable[[Node], bool] | None = None,
+) -> list[Node]:
+    """
+    剪枝，返回新的树，原树不变
+    include 返回 False 时去掉节点及其子树
+    drop_empty 返回 True 且剪枝后没有子节点时去掉该节点（如空目录）
+    """
+    # 先序遍历保留的节点，记录 (节点, 父节点在 order 中的下标)
+    order: list[tuple[Node, int]] = []
+    stack = [(node, -1) for node in reversed(roots)]
+    while stack:
+        node, parent_index = stack.pop()
+        if not include(node):
+            continue
+        index = len(order)
+        order.append((node, parent_index))
+        stack.extend((child, index) for child in reversed(node.get(children_key, ())))
+
+    # 逆序处理，子节点总是先于父节点完成，同级节点逆序追加，最后再反转
+    kept_children: list[list[Node]] = [[] for _ in order]
+    result: list[Node] = []
+    for index in range(len(order) - 1, -1, -1):
+        node, parent_index = order[index]
+        children = kept_children[index]
+        if not children and drop_empty is not None and drop_empty(node):
+            continue
+        copy = {k: v for k, v in node.items() if k != children_key}
+        if children:
+            children.reverse()
+            copy[children_key] = children
+        (kept_children[parent_index] if parent_index >= 0 else result).append(copy)
+    result.reverse()
+    return result
+
+
+def iter_tree_json(
+    roots: Iterable[Node],
+    *,
+    children_key: str = "children",
+    exclude: frozenset[str] = frozenset(),
+    exclude_none: bool = True,
+    chunk_size: int = 64 * 1024,
+) -> Iterator[bytes]:
+    """
+    将树序列化为 JSON 数组，按约 chunk_size 字符分块输出，可以直接作为 StreamingResponse 的内容
+    exclude: 不输出的字段；exclude_none: 不输出值为 None 的字段
+    """
+    buffer: list[str] = ["["]
+    size = 1
+    stack: list[Iterator[Node]] = [iter(roots)]
+    first = [True]
+    children_prefix = f"{_encode(children_key)}:["
+    while stack:
+        node = next(stack[-1], _END)
+        if node is _END:
+            stack.pop()
+            first.pop()
+            part = "]}" if stack else "]"
+        else:
+            fields = [
+                f"{_encode(k)}:{_encode(v)}"
+                for k, v in node.items()
+                if k != children_key and k not in exclude and not (exclude_none and v is None)
+            ]
+            children = node.get(children_key)
+            separator = "" if first[-1] else ","
+            first[-1] = False
+            if children:
+                fields.append(children_prefix)
+                part = separator + "{" + ",".join(fields)
+                stack.append(iter(children))
+                first.append(True)
+            else:
+                part = separator + "{" + ",".join(fields) + "}"
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode()
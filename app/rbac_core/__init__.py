@@ -1,4 +1,4 @@
-from .associations import role_permission, user_department, user_role
+from .associations import department_role, role_closure, role_parent, role_permission, user_department, user_effective_permission, user_role
 from .department import schemas as department_schemas
 from .department.models import Department
 from .department.services import department_service
@@ -22,6 +22,10 @@ __all__ = [
     "Permission",
     "Menu",
     "role_permission",
+    "user_effective_permission",
+    "role_parent",
+    "role_closure",
+    "department_role",
     "user_schemas",
     "role_schemas",
     "department_schemas",
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Table
+from sqlalchemy import Column, ForeignKey, Index, Integer, Table
 
 from app.core.database import Base
 
@@ -18,6 +18,26 @@ role_permission = Table(
     Column("permission_id", ForeignKey("rbac_permissions.id", ondelete="CASCADE"), primary_key=True),
 )
 
+# 角色继承关系，role_id 继承 parent_id 的全部权限，一个角色可以有多个父角色
+role_parent = Table(
+    "rbac_role_parent",
+    Base.metadata,
+    Column("role_id", ForeignKey("rbac_roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("parent_id", ForeignKey("rbac_roles.id", ondelete="CASCADE"), primary_key=True),
+)
+
+# 角色继承闭包表，每个有效角色与它自身(depth=0)及所有直接或间接父角色各一行，由 app/rbac_core/role/hierarchy.py 维护
+# 角色的有效权限为 ancestor_id 的权限之和，鉴权时不需要递归查询
+role_closure = Table(
+    "rbac_role_closure",
+    Base.metadata,
+    Column("role_id", ForeignKey("rbac_roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("ancestor_id", ForeignKey("rbac_roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("depth", Integer, nullable=False, default=0),
+    # 按父角色查找所有子孙角色
+    Index("idx_role_closure_ancestor", "ancestor_id", "role_id"),
+)
+
 
 # 用户部门关联表
 user_department = Table(
@@ -25,4 +45,26 @@ user_department = Table(
     Base.metadata,
     Column("user_id", ForeignKey("rbac_users.id", ondelete="CASCADE"), primary_key=True),
     Column("department_id", ForeignKey("rbac_departments.id", ondelete="CASCADE"), primary_key=True),
+    # 按部门查找成员（部门子树成员、部门授权继承）
+    Index("idx_user_department_department", "department_id", "user_id"),
+)
+
+
+# 用户有效权限表，用户 -> 角色 -> 权限 展开后的结果，由 app/rbac_core/effective.py 维护
+user_effective_permission = Table(
+    "rbac_user_effective_permission",
+    Base.metadata,
+    Column("user_id", ForeignKey("rbac_users.id", ondelete="CASCADE"), primary_key=True),
+    Column("permission_id", ForeignKey("rbac_permissions.id", ondelete="CASCADE"), primary_key=True),
+    # 按权限反查用户（审计：谁可以做某件事）
+    Index("idx_user_effective_permission_permission", "permission_id", "user_id"),
+)
+
+
+# 部门角色关联表，授予部门的角色由该部门及所有下级部门的成员继承
+department_role = Table(
+    "rbac_department_role",
+    Base.metadata,
+    Column("department_id", ForeignKey("rbac_departments.id", ondelete="CASCADE"), primary_key=True),
+    Column("role_id", ForeignKey("rbac_roles.id", ondelete="CASCADE"), primary_key=True),
 )
@@ -1,9 +1,13 @@
-from collections import defaultdict
 from logging import getLogger
 
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.tree import Node, build_tree
+from app.rbac_core import effective, rbac
+from app.rbac_core.role.services import role_service
+
+from . import grants, subtree
 from .models import Department
 from . import schemas as department_schemas
 from .services import department_service
@@ -42,31 +46,13 @@ async def create_department(db: AsyncSession, department_in: department_schemas.
     return new_department
 
 
-async def list_department_as_tree(db: AsyncSession):
+async def list_department_as_tree(db: AsyncSession) -> list[Node]:
     """
-    内存建树（O(n)） + Schema 输出
+    内存建树（O(n)），节点为 dict，结构与 DepartmentReadAsTreeSchema 一致
     """
-    # 1️⃣ 一次性查询所有部门
-    departments = await department_service.crud.list_by_filter(db)
-
-    if not departments:
-        return []
-
-    # 2️⃣ 构建 parent_id -> children 映射
-    children_map: dict[int | None, list[Department]] = defaultdict(list)
-    for dept in departments:
-        children_map[dept.parent_id].append(dept)
-
-    # 3️⃣ 递归构建 Schema 树
-    def build_tree(parent_id: int | None) -> list[department_schemas.DepartmentReadAsTreeSchema] | None:
-        nodes: list[department_schemas.DepartmentReadAsTreeSchema] = []
-        for dept in children_map.get(parent_id, []):
-            node = department_schemas.DepartmentReadAsTreeSchema(id=dept.id, name=dept.name, path=dept.path, childrens=build_tree(dept.id))
-            nodes.append(node)
-        return nodes or None
-
-    # 4️⃣ 从根节点开始
-    return build_tree(None)
+    # 一次性查询所有部门，只查询建树需要的列，不加载 ORM 对象及其成员
+    departments = await department_service.list_values(db, fields=["id", "parent_id", "name", "path"])
+    return build_tree(departments, children_key="childrens")
 
 
 async def get_department_by_id(department_id: int, db: AsyncSession):
@@ -87,16 +73,113 @@ async def update_department(department_id: int, department_in: department_schema
     if not department:
         raise HTTPException(404, "部门不存在")
     update_dict = department_in.model_dump(exclude_unset=True, exclude_none=True)
-    department = await department_service.crud.update(db, department, update_dict)
+    # 修改上级部门需要同时改写整棵子树的 path，与其他字段在同一个事务中提交
+    parent_id = update_dict.pop("parent_id", None)
+    user_ids: list[int] = []
+    if parent_id is not None and parent_id != department.parent_id:
+        user_ids = await _move(db, department, parent_id)
+    department = await department_service.crud.update(db, department, update_dict, commit=False)
+    await db.commit()
+    await db.refresh(department)
+    if user_ids:
+        await rbac.invalidate_users(user_ids)
+    return department
+
+
+async def move_department(department_id: int, move_in: department_schemas.DepartmentMoveSchema, db: AsyncSession):
+    """
+    移动部门及其所有下级部门，不能移动到自身或下级部门下
+    """
+    department = await department_service.crud.get_by_id(db, department_id)
+    if not department:
+        raise HTTPException(404, "部门不存在")
+    user_ids = await _move(db, department, move_in.parent_id)
+    await db.commit()
+    await db.refresh(department)
+    await rbac.invalidate_users(user_ids)
     return department
 
 
+async def _move(db: AsyncSession, department: Department, parent_id: int | None) -> list[int]:
+    """
+    移动部门子树并刷新成员的有效权限，不提交事务，返回受影响的用户ID，由调用方在提交后使其授权缓存失效
+    """
+    parent = None
+    if parent_id is not None:
+        parent = await department_service.crud.get_by_id(db, parent_id)
+        if not parent:
+            raise HTTPException(404, "父部门不存在")
+
+    user_ids = await _subtree_user_ids(db, department.id)
+    moved = await subtree.move(db, department, parent)
+    # 部门授予的角色按 path 前缀继承，移动后子树成员继承的角色随之变化
+    await effective.refresh_users(db, user_ids)
+    logger.info(f"部门{department.id}移动到{parent_id}下，更新{moved}个部门")
+    return user_ids
+
+
 async def delete_department(department_id: int, db: AsyncSession):
     """
-    删除部门
+    删除部门，所有下级部门一起软删除
     """
     department = await department_service.crud.get_by_id(db, department_id)
     if not department:
         raise HTTPException(404, "部门不存在")
-    await department_service.crud.delete(db, department)
+    user_ids = await _subtree_user_ids(db, department_id)
+    deleted = await subtree.soft_delete(db, department)
+    # 已删除部门及其下级部门的成员不再继承该部门授予的角色
+    await effective.refresh_users(db, user_ids)
+    await db.commit()
+    await rbac.invalidate_users(user_ids)
+    logger.info(f"删除部门{department_id}，共{deleted}个部门")
     return None
+
+
+async def restore_department(department_id: int, db: AsyncSession):
+    """
+    恢复已删除的部门及与它一起删除的下级部门
+    """
+    department = await subtree.get_including_deleted(db, department_id)
+    if not department:
+        raise HTTPException(404, "部门不存在")
+    if department.deleted_at is None:
+        raise HTTPException(400, "部门未删除")
+    user_ids = await _subtree_user_ids(db, department_id)
+    restored = await subtree.restore(db, department)
+    await effective.refresh_users(db, user_ids)
+    await db.commit()
+    await db.refresh(department)
+    await rbac.invalidate_users(user_ids)
+    logger.info(f"恢复部门{department_id}，共{restored}个部门")
+    return department
+
+
+async def _subtree_user_ids(db: AsyncSession, department_id: int) -> list[int]:
+    result = await db.execute(grants.subtree_user_ids_stmt([department_id]))
+    return list(result.scalars().all())
+
+
+async def get_department_roles(department_id: int, db: AsyncSession):
+    """
+    获取授予部门的角色
+    """
+    await get_department_by_id(department_id, db)
+    return department_schemas.DepartmentRolesReadSchema(id=department_id, role_ids=await grants.get_role_ids(db, department_id))
+
+
+async def assign_roles_to_department(department_id: int, role_in: department_schemas.DepartmentRoleAssignmentSchema, db: AsyncSession):
+    """
+    为部门授予角色，部门及所有下级部门的成员都持有这些角色
+    """
+    await get_department_by_id(department_id, db)
+    existing_role_ids = await role_service.list_values(db, fields=["id"], id__in=role_in.role_id_list, flat=True)
+    if missing_role_ids := set(role_in.role_id_list) - set(existing_role_ids):
+        raise HTTPException(400, f"不存在的角色ID: {sorted(missing_role_ids)}")
+
+    await grants.set_roles(db, department_id, role_in.role_id_list)
+    user_ids = await _subtree_user_ids(db, department_id)
+    await effective.refresh_users(db, user_ids)
+    await db.commit()
+    await rbac.invalidate_users(user_ids)
+
+    return await get_department_roles(department_id, db)
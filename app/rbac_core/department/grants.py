@@ -0,0 +1,65 @@
+"""
+部门授予的角色
+角色可以授予部门，部门及所有下级部门（path 以授予部门的 path 为前缀）的成员都持有该角色，
+与直接分配给用户的角色一起参与鉴权和缓存
+"""
+
+from typing import Iterable, Sequence
+
+from sqlalchemy import Select, Subquery, and_, delete, insert, select, union
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.rbac_core.associations import department_role, user_department, user_role
+
+from .models import Department
+
+UserScope = Sequence[int] | Select | None
+
+
+def user_roles_subquery(user_ids: UserScope = None) -> Subquery:
+    """
+    用户持有的角色 (user_id, role_id)：直接分配的角色 ∪ 所在部门及上级部门授予的角色
+    user_ids 为 None 时返回所有用户
+    """
+    direct = select(user_role.c.user_id, user_role.c.role_id)
+    member, granted = aliased(Department), aliased(Department)
+    inherited = (
+        select(user_department.c.user_id, department_role.c.role_id)
+        .select_from(user_department)
+        .join(member, and_(member.id == user_department.c.department_id, member.deleted_at.is_(None)))
+        .join(granted, and_(member.path.startswith(granted.path), granted.deleted_at.is_(None)))
+        .join(department_role, department_role.c.department_id == granted.id)
+    )
+    if user_ids is not None:
+        direct = direct.where(user_role.c.user_id.in_(user_ids))
+        inherited = inherited.where(user_department.c.user_id.in_(user_ids))
+    return union(direct, inherited).subquery("user_roles")
+
+
+def subtree_user_ids_stmt(department_ids: Iterable[int]) -> Select:
+    """
+    部门及所有下级部门的成员，已删除的部门也会计入，用于刷新受影响的用户
+    """
+    root, member = aliased(Department), aliased(Department)
+    return (
+        select(user_department.c.user_id)
+        .join(member, member.id == user_department.c.department_id)
+        .join(root, and_(member.path.startswith(root.path), root.id.in_(list(department_ids))))
+        .distinct()
+        .execution_options(include_deleted=True)
+    )
+
+
+async def get_role_ids(db: AsyncSession, department_id: int) -> list[int]:
+    result = await db.execute(select(department_role.c.role_id).where(department_role.c.department_id == department_id).order_by(department_role.c.role_id))
+    return list(result.scalars().all())
+
+
+async def set_roles(db: AsyncSession, department_id: int, role_ids: Sequence[int]) -> None:
+    """
+    设置授予部门的角色，不提交事务
+    """
+    await db.execute(delete(department_role).where(department_role.c.department_id == department_id))
+    if role_ids:
+        await db.execute(insert(department_role), [{"department_id": department_id, "role_id": role_id} for role_id in sorted(set(role_ids))])
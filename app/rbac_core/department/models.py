@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, ForeignKey, String
+from sqlalchemy import BigInteger, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import DBBaseModel
@@ -20,4 +20,8 @@ class Department(DBBaseModel):
     parent: Mapped["Department | None"] = relationship("Department", remote_side=[id], back_populates="childrens")
     users = relationship("app.rbac_core.user.models.User", secondary=user_department, back_populates="departments", lazy="selectin")
 
-    __table_args__ = {"comment": "部门表"}
+    __table_args__ = (
+        # 数据范围按 path LIKE '/1/3/%' 前缀匹配，PostgreSQL 需要 varchar_pattern_ops 才能在非 C 排序规则下使用索引
+        Index("idx_rbac_departments_path_pattern", "path", postgresql_ops={"path": "varchar_pattern_ops"}),
+        {"comment": "部门表"},
+    )
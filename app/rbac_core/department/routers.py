@@ -1,7 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.depends import db_depends, login_depends
+from app.core.response_cache import response_cache
+from app.core.tree import iter_tree_json
 
 from . import controllers as department_controller
 from . import schemas as department_schema
@@ -9,9 +11,13 @@ from . import schemas as department_schema
 router = APIRouter(prefix="/department", tags=["部门管理"], dependencies=[login_depends])
 
 @router.get("", response_model=list[department_schema.DepartmentReadAsTreeSchema], response_model_exclude_none=True, summary="获取部门树", description="获取部门树结构",name="department:list_as_tree")
-async def list_department_as_tree(db: AsyncSession = db_depends):
-    result = await department_controller.list_department_as_tree(db)
-    return result
+async def list_department_as_tree(request: Request, db: AsyncSession = db_depends):
+    async def build() -> bytes:
+        tree = await department_controller.list_department_as_tree(db)
+        # 直接序列化 dict 节点，不为每个节点创建 Schema 对象
+        return b"".join(iter_tree_json(tree, children_key="childrens", exclude=frozenset({"parent_id"})))
+
+    return await response_cache.respond(request, tables=["rbac_departments"], build=build)
 
 
 @router.post("", response_model=department_schema.DepartmentReadSchema, summary="创建部门", description="创建部门",name="department:create")
@@ -32,7 +38,31 @@ async def update_department(department_id: int, department_in: department_schema
     return result
 
 
-@router.delete("/{department_id}", status_code=204, summary="删除部门", description="通过ID删除部门",name="department:delete")
+@router.put("/{department_id}/parent", response_model=department_schema.DepartmentReadSchema, summary="移动部门", description="将部门及其所有下级部门移动到新的父级部门下",name="department:move")
+async def move_department(department_id: int, move_in: department_schema.DepartmentMoveSchema, db: AsyncSession = db_depends):
+    result = await department_controller.move_department(department_id, move_in, db)
+    return result
+
+
+@router.post("/{department_id}/restore", response_model=department_schema.DepartmentReadSchema, summary="恢复部门", description="恢复已删除的部门及与它一起删除的下级部门",name="department:restore")
+async def restore_department(department_id: int, db: AsyncSession = db_depends):
+    result = await department_controller.restore_department(department_id, db)
+    return result
+
+
+@router.delete("/{department_id}", status_code=204, summary="删除部门", description="通过ID删除部门及其所有下级部门",name="department:delete")
 async def delete_department(department_id: int, db: AsyncSession = db_depends):
     await department_controller.delete_department(department_id, db)
     return
+
+
+@router.get("/{department_id}/roles", response_model=department_schema.DepartmentRolesReadSchema, summary="获取部门角色", description="获取授予部门的角色",name="department:retrieve_role")
+async def get_department_roles(department_id: int, db: AsyncSession = db_depends):
+    result = await department_controller.get_department_roles(department_id, db)
+    return result
+
+
+@router.put("/{department_id}/roles", response_model=department_schema.DepartmentRolesReadSchema, summary="为部门授予角色", description="为部门授予角色，部门及所有下级部门的成员都持有这些角色",name="department:assign_role")
+async def assign_roles_to_department(department_id: int, role_in: department_schema.DepartmentRoleAssignmentSchema, db: AsyncSession = db_depends):
+    result = await department_controller.assign_roles_to_department(department_id, role_in, db)
+    return result
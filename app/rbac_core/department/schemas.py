@@ -17,6 +17,12 @@ class DepartmentUpdateSchema(BaseModel):
     parent_id: int | None = Field(None, description="父级部门ID")
 
 
+class DepartmentMoveSchema(BaseModel):
+    """部门移动"""
+
+    parent_id: int | None = Field(None, description="新的父级部门ID，为空时移动为根部门")
+
+
 class DepartmentReadSchema(BaseSchema):
     """
     部门树读取
@@ -27,6 +33,19 @@ class DepartmentReadSchema(BaseSchema):
     model_config = {"from_attributes": True}
 
 
+class DepartmentRoleAssignmentSchema(BaseModel):
+    """部门角色分配"""
+
+    role_id_list: list[int] = Field(..., description="角色ID列表")
+
+
+class DepartmentRolesReadSchema(BaseModel):
+    """部门角色读取"""
+
+    id: int = Field(..., description="部门ID")
+    role_ids: list[int] = Field([], description="授予部门的角色ID列表")
+
+
 class DepartmentReadAsTreeSchema(BaseModel):
     """
     部门树读取
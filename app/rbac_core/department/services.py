@@ -1,7 +1,19 @@
 from pydantic import BaseModel
+from sqlalchemy import ColumnElement
+
+from app.core.data_scope import DataScope
 
 from app.core.query_service import QueryService
 
 from .models import Department
 
-department_service: QueryService[Department, BaseModel] = QueryService(Department)
+
+
+def department_scope_filter(scope: DataScope) -> ColumnElement[bool]:
+    """
+    部门本身在数据范围的子树内
+    """
+    return scope.path_condition(Department.path)
+
+
+department_service: QueryService[Department, BaseModel] = QueryService(Department, scope_filter=department_scope_filter)
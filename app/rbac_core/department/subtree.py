@@ -0,0 +1,91 @@
+"""
+部门子树的集合操作
+部门及所有下级部门共享 path 前缀（/1/3/ 与 /1/3/8/），移动、删除、恢复整棵子树都只需一条
+UPDATE ... WHERE path LIKE '/1/3/%'，不把子树加载到内存，耗时与子树大小基本无关
+所有函数都不提交事务，也不刷新有效权限和缓存，由调用方处理
+"""
+
+from datetime import datetime, timezone
+
+from fastapi import HTTPException
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import Department
+
+
+def _subtree(path: str):
+    # path 以 / 结尾，/1/3/% 不会匹配到 /1/30/
+    return Department.path.like(f"{path}%")
+
+
+async def get_including_deleted(db: AsyncSession, department_id: int) -> Department | None:
+    """
+    按ID获取部门，包括已删除的部门
+    """
+    stmt = select(Department).where(Department.id == department_id).execution_options(include_deleted=True)
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+
+async def move(db: AsyncSession, department: Department, parent: Department | None) -> int:
+    """
+    将部门及其下级部门移动到 parent 下，parent 为 None 时移动为根部门
+    在 SQL 中把子树所有节点（包括已删除的节点）的 path 前缀替换为新前缀，返回更新的行数
+    """
+    if parent is not None and parent.path.startswith(department.path):
+        raise HTTPException(400, "不能将部门移动到自身或其下级部门下")
+
+    old_prefix = department.path
+    new_prefix = f"{parent.path if parent is not None else '/'}{department.id}/"
+    parent_id = parent.id if parent is not None else None
+    if new_prefix == old_prefix:
+        return 0
+
+    stmt = (
+        update(Department)
+        .where(_subtree(old_prefix))
+        .values(
+            path=literal(new_prefix) + func.substr(Department.path, len(old_prefix) + 1),
+            parent_id=case((Department.id == department.id, parent_id), else_=Department.parent_id),
+            updated_at=datetime.now(timezone.utc),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+async def soft_delete(db: AsyncSession, department: Department) -> int:
+    """
+    软删除部门及其所有未删除的下级部门，使用同一个删除时间，返回删除的行数
+    """
+    stmt = (
+        update(Department)
+        .where(_subtree(department.path), Department.deleted_at.is_(None))
+        .values(deleted_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
+
+
+async def restore(db: AsyncSession, department: Department) -> int:
+    """
+    恢复与部门一起删除（删除时间相同）的整棵子树，删除部门之前已经单独删除的下级部门保持删除
+    上级部门已删除时不能恢复，返回恢复的行数
+    """
+    if department.deleted_at is None:
+        return 0
+    if department.parent_id is not None:
+        parent = await get_including_deleted(db, department.parent_id)
+        if parent is not None and parent.deleted_at is not None:
+            raise HTTPException(400, "上级部门已删除，请先恢复上级部门")
+
+    stmt = (
+        update(Department)
+        .where(_subtree(department.path), Department.deleted_at == department.deleted_at)
+        .values(deleted_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return result.rowcount
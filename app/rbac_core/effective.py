@@ -0,0 +1,123 @@
+"""
+用户有效权限物化表维护
+rbac_user_effective_permission 保存 用户 -> 角色 -> 权限 展开后的结果（包含从父角色继承的权限），只包含未删除的用户、角色和权限，
+授权查询和审计只需要按 user_id 或 permission_id 做一次索引查找
+写操作在同一个事务中调用 refresh_*：在受影响的范围内对比期望结果和现有数据，只插入缺失的行、删除多余的行
+超级管理员不在表中展开，仍由角色名称判断
+"""
+
+from typing import Sequence
+
+from sqlalchemy import ColumnElement, Select, and_, delete, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.rbac_core.associations import role_closure, role_permission, user_effective_permission
+from app.rbac_core.department.grants import UserScope, user_roles_subquery
+from app.rbac_core.permission.models import Permission
+from app.rbac_core.role.models import Role
+from app.rbac_core.user.models import User
+
+_effective = user_effective_permission
+
+
+def effective_permission_stmt(user_ids: UserScope = None, permission_ids: Sequence[int] | None = None) -> Select:
+    """
+    期望的有效权限 (user_id, permission_id)，角色包含直接分配和部门授予的，软删除条件显式写在 JOIN 中
+    """
+    user_roles = user_roles_subquery(user_ids)
+    ancestor = aliased(Role)
+    stmt = (
+        select(user_roles.c.user_id, role_permission.c.permission_id)
+        .select_from(user_roles)
+        .join(User, and_(User.id == user_roles.c.user_id, User.deleted_at.is_(None)))
+        .join(Role, and_(Role.id == user_roles.c.role_id, Role.deleted_at.is_(None)))
+        .join(role_closure, role_closure.c.role_id == Role.id)
+        .join(ancestor, and_(ancestor.id == role_closure.c.ancestor_id, ancestor.deleted_at.is_(None)))
+        .join(role_permission, role_permission.c.role_id == ancestor.id)
+        .join(Permission, and_(Permission.id == role_permission.c.permission_id, Permission.deleted_at.is_(None)))
+        .execution_options(include_deleted=True)
+    )
+    if permission_ids is not None:
+        stmt = stmt.where(role_permission.c.permission_id.in_(permission_ids))
+    return stmt
+
+
+def _stored_stmt(user_ids: UserScope, permission_ids: Sequence[int] | None) -> Select:
+    return select(_effective.c.user_id, _effective.c.permission_id).where(*_scope(user_ids, permission_ids))
+
+
+def _scope(user_ids: UserScope, permission_ids: Sequence[int] | None) -> list[ColumnElement[bool]]:
+    conditions: list[ColumnElement[bool]] = []
+    if user_ids is not None:
+        conditions.append(_effective.c.user_id.in_(user_ids))
+    if permission_ids is not None:
+        conditions.append(_effective.c.permission_id.in_(permission_ids))
+    return conditions
+
+
+def _missing_stmt(user_ids: UserScope, permission_ids: Sequence[int] | None) -> Select:
+    """期望存在但表中没有的行"""
+    expected = effective_permission_stmt(user_ids, permission_ids)
+    columns = expected.selected_columns
+    return expected.where(tuple_(columns.user_id, columns.permission_id).not_in(_stored_stmt(user_ids, permission_ids))).distinct()
+
+
+def _extra_condition(user_ids: UserScope, permission_ids: Sequence[int] | None) -> list[ColumnElement[bool]]:
+    """表中存在但已经不应该存在的行"""
+    expected = effective_permission_stmt(user_ids, permission_ids)
+    return [*_scope(user_ids, permission_ids), tuple_(_effective.c.user_id, _effective.c.permission_id).not_in(expected)]
+
+
+async def _reconcile(db: AsyncSession, user_ids: UserScope = None, permission_ids: Sequence[int] | None = None) -> tuple[int, int]:
+    """
+    在指定范围内同步有效权限，返回(插入行数, 删除行数)，不提交事务
+    """
+    # 先把会话中未写入的关联变更写入数据库
+    await db.flush()
+    deleted = await db.execute(delete(_effective).where(*_extra_condition(user_ids, permission_ids)))
+    inserted = await db.execute(insert(_effective).from_select(["user_id", "permission_id"], _missing_stmt(user_ids, permission_ids)))
+    return inserted.rowcount, deleted.rowcount  # pyright: ignore
+
+
+async def refresh_users(db: AsyncSession, user_ids: UserScope) -> tuple[int, int]:
+    """
+    用户的角色或部门变更、用户删除后调用
+    """
+    return await _reconcile(db, user_ids=user_ids)
+
+
+async def refresh_roles(db: AsyncSession, role_ids: Sequence[int]) -> tuple[int, int]:
+    """
+    角色的权限或继承关系变更、角色删除后调用，刷新直接或通过部门持有这些角色及其子孙角色的用户
+    """
+    user_roles = user_roles_subquery()
+    holders = (
+        select(user_roles.c.user_id)
+        .outerjoin(role_closure, role_closure.c.role_id == user_roles.c.role_id)
+        .where((user_roles.c.role_id.in_(role_ids)) | (role_closure.c.ancestor_id.in_(role_ids)))
+    )
+    return await _reconcile(db, user_ids=holders)
+
+
+async def refresh_permissions(db: AsyncSession, permission_ids: Sequence[int]) -> tuple[int, int]:
+    """
+    权限删除后调用
+    """
+    return await _reconcile(db, permission_ids=permission_ids)
+
+
+async def drift(db: AsyncSession) -> tuple[int, int]:
+    """
+    统计整张表与期望结果的差异，返回(缺失行数, 多余行数)
+    """
+    missing = await db.scalar(select(func.count()).select_from(_missing_stmt(None, None).subquery()))
+    extra = await db.scalar(select(func.count()).select_from(_effective).where(*_extra_condition(None, None)))
+    return missing or 0, extra or 0
+
+
+async def rebuild(db: AsyncSession) -> tuple[int, int]:
+    """
+    全量同步整张表，返回(插入行数, 删除行数)，不提交事务
+    """
+    return await _reconcile(db)
@@ -0,0 +1,67 @@
+"""
+当前用户有权访问的菜单树
+全量菜单树按 rbac_menus 的数据版本号只构建一次；按用户的权限掩码裁剪后序列化为 JSON，
+以 (菜单版本号, 授权版本号, 权限掩码) 为 key 缓存，权限相同的用户共享同一份响应体
+"""
+
+from logging import getLogger
+
+from cachetools import LRUCache
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.data_versions import data_versions
+from app.core.tree import Node, build_tree, iter_tree_json, prune_tree
+from app.rbac_core import rbac
+
+from .services import menu_service
+
+logger = getLogger(__name__)
+
+# 响应中的菜单字段，与 MenuReadAsTreeSchema 一致
+MENU_FIELDS = ("id", "code", "title", "is_directory", "path", "icon", "sort", "is_visible", "parent_id")
+
+# 全量菜单树，value为(菜单版本号, 根节点列表)，节点额外带有 permission_id
+menu_tree_cache = LRUCache(maxsize=1)
+# 裁剪后的菜单树JSON，按响应体字节数限制容量
+menu_payload_cache = LRUCache(maxsize=settings.RBAC_MENU_CACHE_BYTES, getsizeof=len)
+
+
+async def _load_menu_tree(db: AsyncSession, version: int) -> list[Node]:
+    cached = menu_tree_cache.get("tree")
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    rows = await menu_service.list_values(db, fields=[*MENU_FIELDS, "permission_id"])
+    roots = build_tree(rows, sort_key="sort")
+    menu_tree_cache["tree"] = (version, roots)
+    logger.info(f"菜单树构建完成，共{len(rows)}个菜单")
+    return roots
+
+
+async def get_user_menu_payload(db: AsyncSession, user_id: int) -> bytes:
+    """
+    获取用户可访问的菜单树，返回序列化后的 JSON
+    只保留可见且有权限的菜单（permission_id 为空的菜单为公共菜单），没有可访问子菜单的目录一并去掉
+    """
+    (version,) = await data_versions.current("rbac_menus")
+    grant = await rbac.get_user_grant(db, user_id)
+    fingerprint = "*" if grant.is_superadmin else grant.mask
+    key = (version, grant.stamp[0], fingerprint)
+    payload = menu_payload_cache.get(key)
+    if payload is not None:
+        return payload
+
+    roots = await _load_menu_tree(db, version)
+    bitmap, mask, is_superadmin = grant.bitmap, grant.mask, grant.is_superadmin
+
+    def include(node: Node) -> bool:
+        if not node["is_visible"]:
+            return False
+        permission_id = node["permission_id"]
+        return permission_id is None or is_superadmin or bitmap.has_id(mask, permission_id)
+
+    items = prune_tree(roots, include, drop_empty=lambda node: node["is_directory"])
+    payload = b"".join(iter_tree_json(items, exclude=frozenset({"permission_id"})))
+    menu_payload_cache[key] = payload
+    return payload
@@ -1,35 +1,28 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException
 from logging import getLogger
+
+from app.core.tree import Node, build_tree
+from . import authorized
 from . import schemas as menu_schemas
-from .models import Menu
 from .services import menu_service
 
 logger = getLogger(__name__)
 
 
-async def list_menu_as_tree(db: AsyncSession):
+async def list_menu_as_tree(db: AsyncSession) -> list[Node]:
     """
-    获取菜单树结构,内存构建树形结构
+    获取菜单树结构,内存构建树形结构，同级菜单按排序号排序
     """
-    all_menus = await menu_service.crud.list_by_filter(db)
-
-    if not all_menus:
-        return []
-
-    children_map: dict[int | None, list[Menu]] = {}
-    for menu in all_menus:
-        children_map.setdefault(menu.parent_id, []).append(menu)
+    all_menus = await menu_service.list_values(db, fields=list(authorized.MENU_FIELDS))
+    return build_tree(all_menus, sort_key="sort")
 
-    def build_tree(parent_id: int | None) -> list[menu_schemas.MenuReadAsTreeSchema] | None:
-        nodes = []
-        for menu in children_map.get(parent_id, []):
-            node = menu_schemas.MenuReadAsTreeSchema.model_validate(menu)
-            node.children = build_tree(menu.id)
-            nodes.append(node)
-        return nodes or None
 
-    return build_tree(None)
+async def list_my_menu_as_tree(db: AsyncSession, user_id: int) -> bytes:
+    """
+    获取当前用户有权访问的菜单树，只包含可见的菜单，没有可访问子菜单的目录不返回
+    """
+    return await authorized.get_user_menu_payload(db, user_id)
 
 
 async def create_menu(db: AsyncSession, menu_in: menu_schemas.MenuCreateSchema):
@@ -1,6 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.depends import db_depends, login_depends
+from app.core.depends import current_user_depends, db_depends, login_depends
+from app.core.response_cache import response_cache
+from app.core.tree import iter_tree_json
+from app.rbac_core.user.models import User
 from . import schemas as menu_schemas
 from . import controllers as memu_controller
 
@@ -8,9 +11,20 @@ router = APIRouter(prefix="/menu",tags=["菜单管理"], dependencies=[login_dep
 
 
 @router.get("", response_model=list[menu_schemas.MenuReadAsTreeSchema], response_model_exclude_none=True, summary="获取菜单树", description="获取菜单树结构",name="menu:list_as_tree")
-async def list_menu_as_tree(db: AsyncSession = db_depends):
-    result = await memu_controller.list_menu_as_tree(db)
-    return result
+async def list_menu_as_tree(request: Request, db: AsyncSession = db_depends):
+    async def build() -> bytes:
+        tree = await memu_controller.list_menu_as_tree(db)
+        # 直接序列化 dict 节点，不为每个节点创建 Schema 对象
+        return b"".join(iter_tree_json(tree))
+
+    return await response_cache.respond(request, tables=["rbac_menus"], build=build)
+
+
+@router.get("/mine", response_model=list[menu_schemas.MenuReadAsTreeSchema], response_model_exclude_none=True, summary="获取我的菜单树", description="获取当前用户有权访问的菜单树",name="menu:list_mine")
+async def list_my_menu_as_tree(db: AsyncSession = db_depends, current_user: User = current_user_depends):
+    # 返回缓存的 JSON，不再经过 response_model 校验
+    payload = await memu_controller.list_my_menu_as_tree(db, current_user.id)
+    return Response(content=payload, media_type="application/json")
 
 
 @router.post("", response_model=menu_schemas.MenuReadSchema, summary="创建菜单", description="创建菜单",name="menu:create")
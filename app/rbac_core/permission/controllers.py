@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exception_handler import AppException
 from app.core.schemas import PaginatedResult, PaginationParams
+from app.rbac_core import effective, rbac
 
 from .models import Permission
 from .schemas import PermissionCreate, PermissionRead, PermissionUpdate
@@ -23,6 +24,8 @@ async def create_permission(db: AsyncSession, permission_in: PermissionCreate) -
 
     permission_in_dict = permission_in.model_dump(exclude_unset=True, exclude_none=True)
     permission = await permission_service.crud.create(db, permission_in_dict)
+    # 新权限需要在位图中分配bit
+    await rbac.invalidate_all()
     return permission
 
 
@@ -50,6 +53,7 @@ async def update_permission(db: AsyncSession, permission_id: int, permission_in:
     update_data = permission_in.model_dump(exclude_unset=True, exclude_none=True)
 
     permission = await permission_service.crud.update(db, permission, update_data)
+    await rbac.invalidate_all()
     return permission
 
 
@@ -59,7 +63,10 @@ async def delete_permission(db: AsyncSession, permission_id: int) -> bool:
     if not permission:
         raise AppException(status_code=404, detail="权限不存在")
 
-    is_ok = await permission_service.crud.delete(db, permission)
+    is_ok = await permission_service.crud.delete(db, permission, commit=False)
     if not is_ok:
         raise AppException(status_code=500, detail="删除权限失败")
+    await effective.refresh_permissions(db, [permission_id])
+    await db.commit()
+    await rbac.invalidate_all()
     return True
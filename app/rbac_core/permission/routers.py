@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.depends import db_depends, login_depends, pagination_params_depends
+from app.core.responses import paginated_response
 from app.core.schemas import PaginatedResult, PaginationParams
 
 from . import controllers, schemas
@@ -12,7 +13,8 @@ router = APIRouter(prefix="/permissions", tags=["权限"], dependencies=[login_d
 @router.get("/", response_model=PaginatedResult[schemas.PermissionRead], summary="获取权限列表", description="获取权限列表",name="permission:list")
 async def get_permissions(pagination_params: PaginationParams = pagination_params_depends, db: AsyncSession = db_depends):
     """获取权限列表"""
-    return await controllers.get_all_permissions(db, pp=pagination_params)
+    result = await controllers.get_all_permissions(db, pp=pagination_params)
+    return paginated_response(result) if pagination_params.fields else result
 
 
 @router.post("/", response_model=schemas.PermissionRead, summary="创建新权限", description="创建新权限",name="permission:create")
@@ -0,0 +1,87 @@
+import sys
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.rbac_core.permission.models import Permission
+
+# (权限名称, API路径, HTTP方法)
+PermissionTuple = tuple[str, str | None, str | None]
+
+
+def _intern(value: str | None) -> str | None:
+    return None if value is None else sys.intern(value)
+
+
+class PermissionBitmap:
+    """
+    权限位图索引
+    为每个权限分配一个稠密的整数编号(bit)，角色的权限掩码为其所有权限bit的按位或，
+    用户的权限掩码为其所有角色掩码的按位或，权限校验只需一次位运算，与权限总数无关
+    同时持有每个权限唯一的 PermissionTuple，角色快照直接引用这些元组，不重复占用内存
+    """
+
+    __slots__ = ("name_bits", "api_bits", "id_bits", "permissions")
+
+    def __init__(self, name_bits: dict[str, int], api_bits: dict[tuple[str, str], int], id_bits: dict[int, int], permissions: dict[str, PermissionTuple]):
+        # 权限名称 -> bit
+        self.name_bits = name_bits
+        # (api_method, api_path) -> bit
+        self.api_bits = api_bits
+        # 权限ID -> bit
+        self.id_bits = id_bits
+        # 权限名称 -> 权限元组
+        self.permissions = permissions
+
+    @classmethod
+    async def load(cls, db: AsyncSession) -> "PermissionBitmap":
+        """
+        从数据库构建位图，只查询必要的列，不加载ORM对象
+        """
+        result = await db.execute(select(Permission.id, Permission.name, Permission.api_path, Permission.api_method).order_by(Permission.id))
+        name_bits: dict[str, int] = {}
+        api_bits: dict[tuple[str, str], int] = {}
+        id_bits: dict[int, int] = {}
+        permissions: dict[str, PermissionTuple] = {}
+        for bit, (permission_id, name, api_path, api_method) in enumerate(result.all()):
+            permission = (sys.intern(name), _intern(api_path), _intern(api_method))
+            permissions[permission[0]] = permission
+            name_bits[permission[0]] = bit
+            id_bits[permission_id] = bit
+            if api_path and api_method:
+                api_bits[(api_method.upper(), api_path)] = bit
+        return cls(name_bits, api_bits, id_bits, permissions)
+
+    def canonical(self, name: str, api_path: str | None, api_method: str | None) -> PermissionTuple:
+        """
+        返回位图中唯一的权限元组，位图构建之后新增的权限返回新元组
+        """
+        permission = self.permissions.get(name)
+        if permission is not None and permission[1] == api_path and permission[2] == api_method:
+            return permission
+        return (sys.intern(name), _intern(api_path), _intern(api_method))
+
+    def mask_of(self, permission_names: Iterable[str]) -> int:
+        """
+        计算多个权限的掩码
+        """
+        mask = 0
+        name_bits = self.name_bits
+        for name in permission_names:
+            bit = name_bits.get(name)
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    def has_name(self, mask: int, permission_name: str) -> bool:
+        bit = self.name_bits.get(permission_name)
+        return bit is not None and (mask >> bit) & 1 == 1
+
+    def has_id(self, mask: int, permission_id: int) -> bool:
+        bit = self.id_bits.get(permission_id)
+        return bit is not None and (mask >> bit) & 1 == 1
+
+    def has_api(self, mask: int, api_path: str, api_method: str) -> bool:
+        bit = self.api_bits.get((api_method.upper(), api_path))
+        return bit is not None and (mask >> bit) & 1 == 1
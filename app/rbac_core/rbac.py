@@ -1,94 +1,512 @@
+from dataclasses import dataclass
 from logging import getLogger
-from typing import Sequence
+from typing import Any, Iterable, Sequence
 
 from cachetools import TTLCache
-from sqlalchemy import select
+from sqlalchemy import Select, and_, select
+from sqlalchemy.orm import aliased
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
 from app.config import settings
+from app.core.cache import cache
+from app.core.data_scope import DataScope
+from app.core.single_flight import SingleFlight
+from app.rbac_core.associations import role_closure, role_permission, user_department
+from app.rbac_core.department.grants import user_roles_subquery
+from app.rbac_core.department.models import Department
 from app.rbac_core.permission.models import Permission
+from app.rbac_core.permission_bitmap import PermissionBitmap, PermissionTuple
 from app.rbac_core.role.models import Role
-from app.rbac_core.user.models import User
+from app.rbac_core.shared_snapshot import SharedSnapshot, SnapshotView
+from app.rbac_core.snapshots import (
+    RoleSetGrant,
+    RoleSnapshot,
+    UserDepartments,
+    UserRoles,
+    sizeof_role_set_grant,
+    sizeof_role_snapshot,
+    sizeof_user_departments,
+    sizeof_user_roles,
+)
+from app.rbac_core.versions import authz_versions
 
 logger = getLogger(__name__)
 
-# INFO: ChatGPT 告知，这个缓存存放ORM对象有高风险，但是一直没炸过，目前先不优化
-# 权限缓存，key为user_id, value为权限列表,过期时间和AccessToken过期时间一致
-permissions_cache = TTLCache(maxsize=1024, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
-# 角色缓存，key为user_id, value为角色列表,过期时间和AccessToken过期时间一致
-role_cache = TTLCache(maxsize=1024, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# 超级管理员角色名称，拥有该角色的用户跳过权限校验
+SUPER_ADMIN_ROLE = "super_admin"
 
 
-async def get_user_roles(db: AsyncSession, user_id: int, use_cache: bool = True) -> Sequence[Role]:
+@dataclass(frozen=True, slots=True)
+class AuthorizationContext:
     """
-    获取用户角色
+    用户授权上下文，只包含鉴权需要的列，不持有ORM对象
     """
-    # 先检查缓存
-    if use_cache and user_id in role_cache:
-        logger.info(f"命中缓存，用户{user_id}的角色")
-        return role_cache[user_id]
+
+    user_id: int
+    role_ids: tuple[int, ...]
+    role_names: tuple[str, ...]
+    is_superadmin: bool
+    permissions: tuple[PermissionTuple, ...]
+
+
+# 以下缓存由 authz_versions 版本号判断是否有效，写操作后通过 invalidate_* 使其失效
+# 另外设置 RBAC_CACHE_TTL_SECONDS 过期时间兜底，版本号不跨进程共享（memory 后端）时也不会无限期使用旧授权
+# 缓存分两层：角色层按角色保存权限快照，用户层只保存角色ID，内存随角色数而不是用户数增长
+# 本地缓存之外，使用共享缓存后端时用户角色和角色快照还会以JSON保存到后端，其他进程/节点可以直接复用
+# 角色快照缓存，key为role_id, value为RoleSnapshot
+role_cache = TTLCache(maxsize=settings.RBAC_ROLE_CACHE_BYTES, ttl=settings.RBAC_CACHE_TTL_SECONDS, getsizeof=sizeof_role_snapshot)
+# 角色集合授权缓存，key为排序后的角色ID元组, value为RoleSetGrant，角色相同的用户共享
+grant_cache = TTLCache(maxsize=settings.RBAC_ROLE_CACHE_BYTES, ttl=settings.RBAC_CACHE_TTL_SECONDS, getsizeof=sizeof_role_set_grant)
+# 用户角色缓存，key为user_id, value为UserRoles
+user_role_cache = TTLCache(maxsize=settings.RBAC_USER_CACHE_BYTES, ttl=settings.RBAC_CACHE_TTL_SECONDS, getsizeof=sizeof_user_roles)
+# 用户部门路径缓存，key为user_id, value为UserDepartments，与用户角色使用同一个版本号
+user_department_cache = TTLCache(maxsize=settings.RBAC_USER_CACHE_BYTES, ttl=settings.RBAC_CACHE_TTL_SECONDS, getsizeof=sizeof_user_departments)
+# 权限位图缓存，全局只有一份，value为(版本号, PermissionBitmap)
+bitmap_cache = TTLCache(maxsize=1, ttl=settings.RBAC_CACHE_TTL_SECONDS)
+# 缓存未命中时合并同一个key的并发查询，coalesced 为被合并的请求数
+user_flight = SingleFlight("user_roles")
+department_flight = SingleFlight("user_departments")
+role_flight = SingleFlight("role_snapshots")
+bitmap_flight = SingleFlight("permission_bitmap")
+# 跨进程共享的授权快照，配置了 RBAC_SNAPSHOT_PATH 时权限校验优先读取快照
+shared_snapshot = SharedSnapshot(settings.RBAC_SNAPSHOT_PATH, SUPER_ADMIN_ROLE)
+# 共享缓存条目的过期时间（秒），只用于回收不再访问的条目，有效性仍由版本号判断
+SHARED_CACHE_TTL = 24 * 3600
+
+
+async def _current_snapshot() -> SnapshotView | None:
+    """
+    返回与当前授权数据一致的共享快照
+    未启用、尚未生成，或授权数据变更后新快照还没有发布（重建中或重建失败）时返回 None，调用方退回授权缓存
+    注意：授权变更序号保存在缓存后端中，多个 worker 需要使用共享缓存后端（local/redis），否则快照总被视为过期
+    重新映射会关闭旧的快照，调用方需要在下一次 await 之前用完返回的快照
+    """
+    if not shared_snapshot.enabled:
+        return None
+    # 先读取序号再取快照，取快照之后不再 await，期间其他协程触发的重新映射不会关闭正在使用的快照
+    serial = await authz_versions.serial()
+    view = shared_snapshot.current()
+    if view is None or view.serial != serial:
+        return None
+    return view
+
+
+def _schedule_snapshot() -> None:
+    if shared_snapshot.enabled:
+        shared_snapshot.schedule_publish()
+
+
+async def invalidate_all() -> None:
+    """
+    权限本身发生变更（新增、修改、删除）后调用，所有授权缓存失效
+    """
+    await authz_versions.bump_epoch()
+    _schedule_snapshot()
+    logger.info("授权缓存全部失效")
+
+
+async def invalidate_roles(role_ids: Iterable[int]) -> None:
+    """
+    角色或角色的权限发生变更后调用，这些角色的快照及包含它们的角色集合授权失效
+    """
+    role_ids = list(role_ids)
+    await authz_versions.bump_roles(role_ids)
+    _schedule_snapshot()
+    logger.info(f"角色{role_ids}的授权缓存失效")
+
+
+async def invalidate_users(user_ids: Iterable[int]) -> None:
+    """
+    用户、用户的角色或所在部门发生变更后调用，这些用户的授权缓存和部门路径缓存失效
+    """
+    user_ids = list(user_ids)
+    await authz_versions.bump_users(user_ids)
+    _schedule_snapshot()
+    logger.info(f"用户{user_ids}的授权缓存失效")
+
+
+async def _shared_get_many(keys: Sequence[str]) -> list[Any | None]:
+    if not cache.shared:
+        return [None] * len(keys)
+    return await cache.get_many(keys)
+
+
+async def _shared_set(key: str, value: Any) -> None:
+    if cache.shared:
+        await cache.set(key, value, ttl=SHARED_CACHE_TTL)
+
+
+def _with_role_permissions(stmt: Select) -> Select:
+    """
+    为包含 Role 的查询左连接角色闭包、rbac_role_permission 和 rbac_permissions，并追加祖先角色名称列，
+    权限包含从父角色继承的部分，没有权限的角色也会返回一行，权限列为 NULL
+    """
+    ancestor = aliased(Role)
+    return (
+        stmt.add_columns(ancestor.name)
+        .outerjoin(role_closure, role_closure.c.role_id == Role.id)
+        .outerjoin(ancestor, and_(ancestor.id == role_closure.c.ancestor_id, ancestor.deleted_at.is_(None)))
+        .outerjoin(role_permission, role_permission.c.role_id == ancestor.id)
+        .outerjoin(Permission, and_(Permission.id == role_permission.c.permission_id, Permission.deleted_at.is_(None)))
+        .where(Role.deleted_at.is_(None))
+        # 软删除条件已经显式写在 JOIN 中，不需要全局过滤再追加一遍
+        .execution_options(include_deleted=True)
+    )
+
+
+def authorization_context_stmt(user_id: int) -> Select:
+    """
+    授权上下文查询语句，一次查询返回用户的角色和权限
+    从用户的角色（直接分配和部门授予）出发，经过 rbac_roles 校验角色有效性，再左连接 rbac_role_permission 和 rbac_permissions
+    注意：不要尝试跳过Role,通过中间表直接关联查询，会丢失对角色有效性的校验，存在数据准确性风险
+    """
+    user_roles = user_roles_subquery([user_id])
+    stmt = (
+        select(Role.id, Role.name, Permission.name, Permission.api_path, Permission.api_method)
+        .select_from(user_roles)
+        .join(Role, Role.id == user_roles.c.role_id)
+    )
+    return _with_role_permissions(stmt)
+
+
+def role_snapshot_stmt(role_ids: Sequence[int]) -> Select:
+    """
+    角色快照查询语句，返回指定角色的权限
+    """
+    stmt = select(Role.id, Role.name, Permission.name, Permission.api_path, Permission.api_method).where(Role.id.in_(role_ids))
+    return _with_role_permissions(stmt)
+
+
+def _build_role_snapshots(rows: Sequence, bitmap: PermissionBitmap, stamps: dict[int, tuple[int, ...]]) -> dict[int, RoleSnapshot]:
+    """
+    将 (role_id, role_name, permission_name, api_path, api_method, ancestor_name) 行转换为角色快照
+    角色自身或任一祖先角色是超级管理员时，该角色也是超级管理员
+    stamps 中有版本号的角色写入本地缓存和共享缓存
+    """
+    role_names: dict[int, str] = {}
+    role_permissions: dict[int, dict[PermissionTuple, None]] = {}
+    superadmin_roles: set[int] = set()
+    for role_id, role_name, permission_name, api_path, api_method, ancestor_name in rows:
+        role_names[role_id] = role_name
+        permissions = role_permissions.setdefault(role_id, {})
+        if permission_name is not None:
+            permissions[bitmap.canonical(permission_name, api_path, api_method)] = None
+        if ancestor_name == SUPER_ADMIN_ROLE:
+            superadmin_roles.add(role_id)
+
+    snapshots: dict[int, RoleSnapshot] = {}
+    for role_id, role_name in role_names.items():
+        snapshots[role_id] = _make_role_snapshot(role_id, role_name, role_id in superadmin_roles, tuple(role_permissions[role_id]), bitmap, stamps.get(role_id, ()))
+    return snapshots
+
+
+def _make_role_snapshot(
+    role_id: int, role_name: str, is_superadmin: bool, permissions: tuple[PermissionTuple, ...], bitmap: PermissionBitmap, stamp: tuple[int, ...]
+) -> RoleSnapshot:
+    snapshot = RoleSnapshot(
+        role_id=role_id,
+        name=role_name,
+        is_superadmin=is_superadmin,
+        permissions=permissions,
+        bitmap=bitmap,
+        mask=bitmap.mask_of(p[0] for p in permissions),
+        stamp=stamp,
+    )
+    if stamp:
+        role_cache[role_id] = snapshot
+    return snapshot
+
+
+def _role_cache_key(role_id: int) -> str:
+    return f"rbac:role:{role_id}"
+
+
+def _user_roles_cache_key(user_id: int) -> str:
+    return f"rbac:user_roles:{user_id}"
+
+
+async def get_permission_bitmap(db: AsyncSession, use_cache: bool = True, epoch: int | None = None) -> PermissionBitmap:
+    """
+    获取全局权限位图
+    epoch: 调用方已经读取的全局版本号，不传时重新读取
+    """
+    if not use_cache:
+        return await PermissionBitmap.load(db)
+    stamp = (epoch,) if epoch is not None else await authz_versions.current()
+    cached = bitmap_cache.get("bitmap")
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    logger.info("未命中缓存，构建权限位图")
+    return await bitmap_flight.do(stamp, lambda: _load_permission_bitmap(db, stamp))
+
+
+async def _load_permission_bitmap(db: AsyncSession, stamp: tuple[int, ...]) -> PermissionBitmap:
+    bitmap = await PermissionBitmap.load(db)
+    bitmap_cache["bitmap"] = (stamp, bitmap)
+    logger.info(f"权限位图构建完成，共{len(bitmap.name_bits)}个权限")
+    return bitmap
+
+
+def _is_current_bitmap(bitmap: PermissionBitmap, epoch: int) -> bool:
+    cached = bitmap_cache.get("bitmap")
+    return cached is not None and cached[1] is bitmap and cached[0] == (epoch,)
+
+
+async def get_user_role_ids(db: AsyncSession, user_id: int) -> tuple[int, ...]:
+    """
+    获取用户的有效角色ID，按ID排序
+    """
+    cached = user_role_cache.get(user_id)
+    # 顺便读取上次缓存的角色的版本号，查询结果中这些角色的快照可以直接写入缓存
+    guess = cached.role_ids if cached is not None else ()
+    stamp = await authz_versions.current(user_id, guess)
+    if cached is not None and cached.stamp == stamp[:2]:
+        return cached.role_ids
     logger.info(f"未命中缓存，查询用户{user_id}的角色")
 
-    stmt = select(Role).join(Role.users).where(User.id == user_id)
-    result = await db.execute(stmt)
-    roles = result.scalars().all()
-    # 缓存结果
-    if use_cache:
-        role_cache[user_id] = roles
-        logger.info(f"缓存用户{user_id}的角色：{[r.name for r in roles]}")
-    return roles
+    # 加载结果依赖读取的版本号，变更后读到新版本号的请求不能合并到变更前开始的查询
+    user_roles = await user_flight.do((user_id, stamp[:2]), lambda: _load_user_roles(db, user_id, stamp, guess))
+    return user_roles.role_ids
+
+
+async def _load_user_roles(db: AsyncSession, user_id: int, stamp: tuple[int, ...], guess: tuple[int, ...]) -> UserRoles:
+    """
+    先查共享缓存，未命中时一次查询同时得到用户的角色和这些角色的权限，顺便刷新角色快照
+    stamp 在查询前读取，查询期间发生的变更会使本次结果失效
+    """
+    user_stamp = stamp[:2]
+    (shared,) = await _shared_get_many([_user_roles_cache_key(user_id)])
+    if shared is not None and tuple(shared["s"]) == user_stamp:
+        user_roles = UserRoles(user_id=user_id, role_ids=tuple(shared["r"]), stamp=user_stamp)
+        user_role_cache[user_id] = user_roles
+        return user_roles
+
+    bitmap = await get_permission_bitmap(db, epoch=stamp[0])
+    result = await db.execute(authorization_context_stmt(user_id))
+    # 只有查询前读取过版本号的角色才能写入缓存
+    role_stamps = {role_id: (stamp[0], version) for role_id, version in zip(guess, stamp[2:])}
+    snapshots = _build_role_snapshots(result.all(), bitmap, role_stamps)
+    for role_id, snapshot in snapshots.items():
+        if role_id in role_stamps:
+            await _share_role_snapshot(snapshot)
+
+    user_roles = UserRoles(user_id=user_id, role_ids=tuple(sorted(snapshots)), stamp=user_stamp)
+    user_role_cache[user_id] = user_roles
+    await _shared_set(_user_roles_cache_key(user_id), {"s": user_stamp, "r": user_roles.role_ids})
+    logger.info(f"缓存用户{user_id}的角色：{[s.name for s in snapshots.values()]}")
+    return user_roles
+
+
+async def _share_role_snapshot(snapshot: RoleSnapshot) -> None:
+    await _shared_set(_role_cache_key(snapshot.role_id), {"s": snapshot.stamp, "n": snapshot.name, "a": snapshot.is_superadmin, "p": snapshot.permissions})
+
+
+async def get_role_snapshots(db: AsyncSession, role_ids: Sequence[int], stamp: tuple[int, ...] | None = None) -> list[RoleSnapshot]:
+    """
+    获取角色快照，已删除的角色不会返回
+    stamp: 调用方已经读取的 (epoch, *角色版本号)，不传时重新读取
+    """
+    if stamp is None:
+        stamp = await authz_versions.current(role_ids=role_ids)
+    bitmap = await get_permission_bitmap(db, epoch=stamp[0])
+    snapshots: list[RoleSnapshot] = []
+    missing: dict[int, tuple[int, ...]] = {}
+    for role_id, version in zip(role_ids, stamp[1:]):
+        role_stamp = (stamp[0], version)
+        snapshot = role_cache.get(role_id)
+        if snapshot is not None and snapshot.bitmap is bitmap and snapshot.stamp == role_stamp:
+            snapshots.append(snapshot)
+        else:
+            missing[role_id] = role_stamp
+
+    if missing:
+        logger.info(f"未命中缓存，查询角色{list(missing)}的权限")
+        key = tuple(missing.items())
+        loaded = await role_flight.do(key, lambda: _load_role_snapshots(db, missing, bitmap))
+        snapshots.extend(loaded.values())
+    return snapshots
+
+
+async def _load_role_snapshots(db: AsyncSession, stamps: dict[int, tuple[int, ...]], bitmap: PermissionBitmap) -> dict[int, RoleSnapshot]:
+    role_ids = list(stamps)
+    snapshots: dict[int, RoleSnapshot] = {}
+    shared = await _shared_get_many([_role_cache_key(role_id) for role_id in role_ids])
+    for role_id, data in zip(role_ids, shared):
+        # 没有 "a" 的是旧格式的条目，不知道是否继承了超级管理员，重新查询
+        if data is not None and "a" in data and tuple(data["s"]) == stamps[role_id]:
+            permissions = tuple(bitmap.canonical(*p) for p in data["p"])
+            snapshots[role_id] = _make_role_snapshot(role_id, data["n"], data["a"], permissions, bitmap, stamps[role_id])
+
+    remaining = [role_id for role_id in role_ids if role_id not in snapshots]
+    if remaining:
+        result = await db.execute(role_snapshot_stmt(remaining))
+        loaded = _build_role_snapshots(result.all(), bitmap, stamps)
+        for snapshot in loaded.values():
+            await _share_role_snapshot(snapshot)
+        snapshots.update(loaded)
+    return snapshots
+
+
+async def get_user_grant(db: AsyncSession, user_id: int) -> RoleSetGrant:
+    """
+    获取用户的授权结果（是否超级管理员、权限掩码）
+    缓存命中时只需要一次读取版本号
+    """
+    user_roles = user_role_cache.get(user_id)
+    if user_roles is not None:
+        grant = grant_cache.get(user_roles.role_ids)
+        if grant is not None:
+            stamp = await authz_versions.current(user_id, user_roles.role_ids)
+            if stamp[:2] == user_roles.stamp and (stamp[0], *stamp[2:]) == grant.stamp and _is_current_bitmap(grant.bitmap, stamp[0]):
+                return grant
+
+    role_ids = await get_user_role_ids(db, user_id)
+    stamp = await authz_versions.current(role_ids=role_ids)
+    bitmap = await get_permission_bitmap(db, epoch=stamp[0])
+    grant = grant_cache.get(role_ids)
+    if grant is not None and grant.bitmap is bitmap and grant.stamp == stamp:
+        return grant
+
+    snapshots = await get_role_snapshots(db, role_ids, stamp)
+    mask = 0
+    for snapshot in snapshots:
+        # 并发重建位图时快照可能引用了另一个位图，按权限名称重新计算
+        mask |= snapshot.mask if snapshot.bitmap is bitmap else bitmap.mask_of(p[0] for p in snapshot.permissions)
+    grant = RoleSetGrant(bitmap=bitmap, is_superadmin=any(s.is_superadmin for s in snapshots), mask=mask, stamp=stamp)
+    grant_cache[role_ids] = grant
+    return grant
+
+
+async def get_authorization_context(db: AsyncSession, user_id: int) -> AuthorizationContext:
+    """
+    获取用户授权上下文，由用户角色和角色快照组装，不单独缓存
+    """
+    role_ids = await get_user_role_ids(db, user_id)
+    snapshots = await get_role_snapshots(db, role_ids)
+    permissions: dict[PermissionTuple, None] = {}
+    for snapshot in snapshots:
+        permissions.update(dict.fromkeys(snapshot.permissions))
+    return AuthorizationContext(
+        user_id=user_id,
+        role_ids=tuple(s.role_id for s in snapshots),
+        role_names=tuple(s.name for s in snapshots),
+        is_superadmin=any(s.is_superadmin for s in snapshots),
+        permissions=tuple(permissions),
+    )
 
 
 async def check_is_superadmin(db: AsyncSession, user_id: int) -> bool:
     """
     检查用户是否有超级管理员角色
     """
-    roles = await get_user_roles(db, user_id)
-    logger.info(f"用户{user_id}的角色：{[r.name for r in roles]}")
-    return any(r.name == "super_admin" for r in roles)
+    view = await _current_snapshot()
+    if view is not None:
+        return view.is_superadmin(user_id)
+    grant = await get_user_grant(db, user_id)
+    return grant.is_superadmin
 
 
-async def get_user_permissions(db: AsyncSession, user_id: int, use_cache: bool = True) -> Sequence[Permission]:
+async def get_user_permissions(db: AsyncSession, user_id: int) -> tuple[PermissionTuple, ...]:
     """
-    获取用户权限
-    注意：不要尝试跳过Role,通过中间表直接关联查询，会丢失对角色有效性的校验，存在数据准确性风险
+    获取用户权限，返回(权限名称, API路径, HTTP方法)列表
     """
-    # 先检查缓存
-    if use_cache and user_id in permissions_cache:
-        logger.info(f"命中缓存，用户{user_id}的权限")
-        return permissions_cache[user_id]
-    logger.info(f"未命中缓存，查询用户{user_id}的权限")
-
-    stmt = select(Permission).options(selectinload(Permission.roles).selectinload(Role.users)).where(User.id == user_id)
-    result = await db.execute(stmt)
-    permissions = result.scalars().all()
-    # 缓存结果
-    if use_cache:
-        permissions_cache[user_id] = permissions
-    return permissions
+    context = await get_authorization_context(db, user_id)
+    return context.permissions
 
 
 async def check_user_permission_by_path_and_method(db: AsyncSession, user_id: int, api_path: str, api_method: str) -> bool:
     """
     根据用户ID、API路径和方法检查是否有对应权限
     """
+    view = await _current_snapshot()
+    if view is not None:
+        return view.is_superadmin(user_id) or view.has_api(user_id, api_path, api_method)
+    grant = await get_user_grant(db, user_id)
     # 检查超级管理员权限
-    if await check_is_superadmin(db, user_id):
+    if grant.is_superadmin:
         return True
-
-    user_permissions = await get_user_permissions(db, user_id)
-    has = [p for p in user_permissions if p.api_path == api_path and p.api_method == api_method]
-    return len(has) > 0
+    return grant.bitmap.has_api(grant.mask, api_path, api_method)
 
 
 async def check_user_permission_by_name(db: AsyncSession, user_id: int, permission_name: str) -> bool:
     """
     根据用户ID和权限名称检查是否有对应权限
     """
+    view = await _current_snapshot()
+    if view is not None:
+        return view.is_superadmin(user_id) or view.has_name(user_id, permission_name)
+    grant = await get_user_grant(db, user_id)
     # 检查超级管理员权限
-    if await check_is_superadmin(db, user_id):
+    if grant.is_superadmin:
         return True
+    return grant.bitmap.has_name(grant.mask, permission_name)
+
+
+async def check_user_permissions(db: AsyncSession, user_id: int, permission_names: Sequence[str], apis: Sequence[tuple[str, str]]) -> tuple[list[bool], list[bool]]:
+    """
+    批量检查权限，apis 为 (HTTP方法, 路由模板) 列表，返回与输入顺序一致的结果
+    """
+    view = await _current_snapshot()
+    if view is not None:
+        is_superadmin, mask, name_bits, api_bits = view.is_superadmin(user_id), view.user_mask(user_id), view.name_bits, view.api_bits
+    else:
+        grant = await get_user_grant(db, user_id)
+        is_superadmin, mask, name_bits, api_bits = grant.is_superadmin, grant.mask, grant.bitmap.name_bits, grant.bitmap.api_bits
+
+    def allowed(bit: int | None) -> bool:
+        return is_superadmin or (bit is not None and (mask >> bit) & 1 == 1)
+
+    return (
+        [allowed(name_bits.get(name)) for name in permission_names],
+        [allowed(api_bits.get((method.upper(), path))) for method, path in apis],
+    )
 
-    permissions = await get_user_permissions(db, user_id)
-    return any(p.name == permission_name for p in permissions)
+
+async def get_user_api_routes(db: AsyncSession, user_id: int) -> tuple[bool, list[tuple[str, str]]]:
+    """
+    获取用户可以访问的全部 (HTTP方法, 路由模板)，超级管理员返回所有登记了API的权限
+    """
+    view = await _current_snapshot()
+    if view is not None:
+        is_superadmin, mask, api_bits = view.is_superadmin(user_id), view.user_mask(user_id), view.api_bits
+    else:
+        grant = await get_user_grant(db, user_id)
+        is_superadmin, mask, api_bits = grant.is_superadmin, grant.mask, grant.bitmap.api_bits
+    routes = [api for api, bit in api_bits.items() if is_superadmin or (mask >> bit) & 1]
+    return is_superadmin, routes
+
+
+async def get_user_department_paths(db: AsyncSession, user_id: int) -> tuple[str, ...]:
+    """
+    获取用户所在部门的树路径，按路径排序
+    """
+    stamp = await authz_versions.current(user_id)
+    cached = user_department_cache.get(user_id)
+    if cached is not None and cached.stamp == stamp:
+        return cached.paths
+    logger.info(f"未命中缓存，查询用户{user_id}的部门")
+    departments = await department_flight.do((user_id, stamp), lambda: _load_user_departments(db, user_id, stamp))
+    return departments.paths
+
+
+async def _load_user_departments(db: AsyncSession, user_id: int, stamp: tuple[int, ...]) -> UserDepartments:
+    stmt = (
+        select(Department.path)
+        .join(user_department, user_department.c.department_id == Department.id)
+        .where(user_department.c.user_id == user_id)
+        .order_by(Department.path)
+    )
+    paths = tuple((await db.execute(stmt)).scalars().all())
+    departments = UserDepartments(user_id=user_id, paths=paths, stamp=stamp)
+    user_department_cache[user_id] = departments
+    return departments
+
+
+async def get_data_scope(db: AsyncSession, user_id: int) -> DataScope:
+    """
+    获取用户的数据范围：超级管理员不受限制，其他用户只能访问所在部门子树内的数据
+    """
+    if await check_is_superadmin(db, user_id):
+        return DataScope(user_id=user_id, unrestricted=True)
+    paths = await get_user_department_paths(db, user_id)
+    return DataScope(user_id=user_id, department_paths=DataScope.collapse(paths))
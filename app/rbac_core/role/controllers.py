@@ -5,10 +5,12 @@ from sqlalchemy.orm import selectinload
 
 from app.core.exception_handler import AppException
 from app.core.schemas import PaginatedResult, PaginationParams
+from app.rbac_core import effective, rbac
 from app.rbac_core.permission.services import permission_service
 
+from . import hierarchy
 from .models import Role
-from .schemas import PermissionAssignmentSchema, RoleCreate, RoleRead, RoleUpdate
+from .schemas import ParentAssignmentSchema, PermissionAssignmentSchema, RoleCreate, RoleHierarchyRead, RoleRead, RoleUpdate
 from .services import role_service
 
 logger = getLogger(__name__)
@@ -55,13 +57,22 @@ async def update_role(db: AsyncSession, role_id: int, role_in: RoleUpdate) -> Ro
 
     update_data = role_in.model_dump(exclude_unset=True, exclude_none=True)
     role = await role_service.crud.update(db, role, update_data)
+    # 角色名称决定是否为超级管理员，子孙角色的快照也要失效
+    await rbac.invalidate_roles(await hierarchy.get_descendant_ids(db, [role_id]))
     return role
 
 
 async def delete_role(db: AsyncSession, role_id: int) -> bool:
     """删除角色"""
     role = await get_role_by_id(db, role_id)
-    await role_service.crud.delete(db, role)
+    affected = await hierarchy.get_descendant_ids(db, [role_id])
+    await role_service.crud.delete(db, role, commit=False)
+    # 子孙角色不再经过已删除的角色继承权限
+    await db.flush()
+    await hierarchy.rebuild_closure(db, affected)
+    await effective.refresh_roles(db, affected)
+    await db.commit()
+    await rbac.invalidate_roles(affected)
     return True
 
 
@@ -82,9 +93,39 @@ async def assign_permission_to_role(db: AsyncSession, role_id: int, permission_i
 
     # 为角色分配权限
     role.permissions = await permission_service.crud.list_by_filter(db, id__in=permission_in.permission_id_list)
+    await effective.refresh_roles(db, [role_id])
 
     # 提交事务
     await db.commit()
+    await rbac.invalidate_roles(await hierarchy.get_descendant_ids(db, [role_id]))
 
     return role
 
+
+async def get_role_hierarchy(db: AsyncSession, role_id: int) -> RoleHierarchyRead:
+    """获取角色的父角色和所有祖先角色"""
+    role = await role_service.crud.get_by_id(db, role_id)
+    if not role:
+        raise AppException(detail="角色不存在", status_code=404)
+    return RoleHierarchyRead(id=role_id, parent_ids=await hierarchy.get_parent_ids(db, role_id), ancestor_ids=await hierarchy.get_ancestor_ids(db, role_id))
+
+
+async def assign_parents_to_role(db: AsyncSession, role_id: int, parent_in: ParentAssignmentSchema) -> RoleHierarchyRead:
+    """
+    设置角色的父角色，角色继承父角色的全部权限
+    """
+    role = await role_service.crud.get_by_id(db, role_id)
+    if not role:
+        raise AppException(detail="角色不存在", status_code=404)
+
+    existing_role_ids = await role_service.list_values(db, fields=["id"], id__in=parent_in.parent_id_list, flat=True)
+    if missing_role_ids := set(parent_in.parent_id_list) - set(existing_role_ids):
+        raise AppException(detail=f"不存在的角色ID: {sorted(missing_role_ids)}", status_code=400)
+
+    affected = await hierarchy.set_parents(db, role_id, parent_in.parent_id_list)
+    await effective.refresh_roles(db, affected)
+    await db.commit()
+    await rbac.invalidate_roles(affected)
+
+    return await get_role_hierarchy(db, role_id)
+
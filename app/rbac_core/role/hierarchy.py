@@ -0,0 +1,97 @@
+"""
+角色继承
+rbac_role_parent 保存直接继承关系，rbac_role_closure 保存展开后的闭包，继承关系或角色删除后在写入时重新计算受影响角色的闭包
+角色数量通常很少，闭包在内存中按继承关系计算后整批写入
+"""
+
+from typing import Iterable, Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.exception_handler import AppException
+from app.rbac_core.associations import role_closure, role_parent
+
+from .models import Role
+
+
+async def get_parent_ids(db: AsyncSession, role_id: int) -> list[int]:
+    result = await db.execute(select(role_parent.c.parent_id).where(role_parent.c.role_id == role_id).order_by(role_parent.c.parent_id))
+    return list(result.scalars().all())
+
+
+async def get_ancestor_ids(db: AsyncSession, role_id: int) -> list[int]:
+    """所有直接或间接父角色，不包含自身"""
+    stmt = select(role_closure.c.ancestor_id).where(role_closure.c.role_id == role_id, role_closure.c.depth > 0).order_by(role_closure.c.depth, role_closure.c.ancestor_id)
+    result = await db.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_descendant_ids(db: AsyncSession, role_ids: Iterable[int]) -> list[int]:
+    """角色自身及所有继承了它们的子孙角色"""
+    role_ids = list(role_ids)
+    result = await db.execute(select(role_closure.c.role_id).where(role_closure.c.ancestor_id.in_(role_ids)).distinct())
+    return sorted(set(role_ids) | set(result.scalars().all()))
+
+
+async def set_parents(db: AsyncSession, role_id: int, parent_ids: Sequence[int]) -> list[int]:
+    """
+    设置角色的父角色，返回闭包发生变化的角色ID（自身及子孙角色），不提交事务
+    """
+    parent_ids = sorted(set(parent_ids))
+    if role_id in parent_ids:
+        raise AppException(status_code=400, detail="角色不能继承自身")
+    # 父角色已经（直接或间接）继承了当前角色时会形成环
+    result = await db.execute(select(role_closure.c.role_id).where(role_closure.c.role_id.in_(parent_ids), role_closure.c.ancestor_id == role_id))
+    if cycle := result.scalars().all():
+        raise AppException(status_code=400, detail=f"角色继承存在循环: {sorted(cycle)}")
+
+    await db.execute(delete(role_parent).where(role_parent.c.role_id == role_id))
+    if parent_ids:
+        await db.execute(insert(role_parent), [{"role_id": role_id, "parent_id": parent_id} for parent_id in parent_ids])
+    affected = await get_descendant_ids(db, [role_id])
+    await rebuild_closure(db, affected)
+    return affected
+
+
+async def rebuild_closure(db: AsyncSession, role_ids: Sequence[int] | None = None) -> None:
+    """
+    重新计算角色的闭包，已删除的角色及经过它们的继承关系不计入，role_ids 为 None 时重建全部，不提交事务
+    """
+    child, parent = aliased(Role), aliased(Role)
+    edges = await db.execute(
+        select(role_parent.c.role_id, role_parent.c.parent_id)
+        .join(child, child.id == role_parent.c.role_id)
+        .join(parent, parent.id == role_parent.c.parent_id)
+    )
+    parents: dict[int, list[int]] = {}
+    for role, parent_id in edges.all():
+        parents.setdefault(role, []).append(parent_id)
+
+    alive_stmt = select(Role.id)
+    if role_ids is not None:
+        alive_stmt = alive_stmt.where(Role.id.in_(role_ids))
+    alive = (await db.execute(alive_stmt)).scalars().all()
+
+    rows = []
+    for role in alive:
+        # 广度优先，depth 为最短继承距离
+        depths = {role: 0}
+        frontier = [role]
+        while frontier:
+            next_frontier = []
+            for current in frontier:
+                for parent_id in parents.get(current, ()):
+                    if parent_id not in depths:
+                        depths[parent_id] = depths[current] + 1
+                        next_frontier.append(parent_id)
+            frontier = next_frontier
+        rows.extend({"role_id": role, "ancestor_id": ancestor, "depth": depth} for ancestor, depth in depths.items())
+
+    stmt = delete(role_closure)
+    if role_ids is not None:
+        stmt = stmt.where(role_closure.c.role_id.in_(role_ids))
+    await db.execute(stmt)
+    if rows:
+        await db.execute(insert(role_closure), rows)
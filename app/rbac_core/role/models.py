@@ -1,8 +1,8 @@
-from sqlalchemy import Index, String
+from sqlalchemy import Index, String, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import DBBaseModel
-from app.rbac_core.associations import role_permission, user_role
+from app.rbac_core.associations import role_closure, role_permission, user_role
 
 
 class Role(DBBaseModel):
@@ -26,3 +26,9 @@ class Role(DBBaseModel):
     )
 
     __table_args__ = (Index("idx_roles_name", "name", unique=True, postgresql_where="deleted_at IS NULL"), {"comment": "角色表"})
+
+
+@event.listens_for(Role, "after_insert")
+def _insert_role_closure(mapper, connection, target: Role):
+    """新角色在闭包表中写入自身一行，不论通过哪条路径创建"""
+    connection.execute(role_closure.insert().values(role_id=target.id, ancestor_id=target.id, depth=0))
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.depends import db_depends, login_depends, pagination_params_depends
+from app.core.responses import paginated_response
 from app.core.schemas import PaginatedResult, PaginationParams
 
 from . import controllers, schemas
@@ -17,7 +18,8 @@ async def create_role(role_in: schemas.RoleCreate, db: AsyncSession = db_depends
 @router.get("", response_model=PaginatedResult[schemas.RoleRead], summary="获取角色列表", description="获取所有角色的分页列表",name="role:list")
 async def get_roles(pp: PaginationParams = pagination_params_depends, db: AsyncSession = db_depends):
     """获取角色列表"""
-    return await controllers.get_all_roles(db, pp)
+    result = await controllers.get_all_roles(db, pp)
+    return paginated_response(result) if pp.fields else result
 
 
 @router.get("/{role_id}", response_model=schemas.RoleReadWithPermissions, summary="根据ID获取角色", description="根据角色ID获取角色信息",name="role:retrieve")
@@ -46,3 +48,15 @@ async def assign_permission(role_id: int, permission_in: schemas.PermissionAssig
     """给角色分配权限"""
     role = await controllers.assign_permission_to_role(db, role_id, permission_in)
     return role
+
+
+@router.get("/{role_id}/parents", response_model=schemas.RoleHierarchyRead, summary="获取角色继承关系", description="获取角色的父角色和所有祖先角色",name="role:retrieve_parent")
+async def get_role_parents(role_id: int, db: AsyncSession = db_depends):
+    """获取角色继承关系"""
+    return await controllers.get_role_hierarchy(db, role_id)
+
+
+@router.put("/{role_id}/parents", response_model=schemas.RoleHierarchyRead, summary="设置父角色", description="设置角色的父角色，角色继承父角色的全部权限",name="role:assign_parent")
+async def assign_parents(role_id: int, parent_in: schemas.ParentAssignmentSchema, db: AsyncSession = db_depends):
+    """设置父角色"""
+    return await controllers.assign_parents_to_role(db, role_id, parent_in)
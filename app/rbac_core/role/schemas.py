@@ -40,6 +40,24 @@ class PermissionAssignmentSchema(BaseModel):
     permission_id_list: list[int] = Field(..., description="权限ID列表")
 
 
+class ParentAssignmentSchema(BaseModel):
+    """
+    父角色分配模型
+    """
+
+    parent_id_list: list[int] = Field(..., description="父角色ID列表")
+
+
+class RoleHierarchyRead(BaseModel):
+    """
+    角色继承关系
+    """
+
+    id: int = Field(..., description="角色ID")
+    parent_ids: list[int] = Field([], description="直接父角色ID列表")
+    ancestor_ids: list[int] = Field([], description="所有祖先角色ID列表，按继承距离排序")
+
+
 class PermissionSimpleSchema(BaseModel):
     """
     权限简单信息
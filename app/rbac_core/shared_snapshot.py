@@ -0,0 +1,344 @@
+"""
+跨进程共享的授权快照
+由一个进程把完整的 角色/权限/用户角色 关系编码成紧凑的二进制文件，所有 worker 通过 mmap 只读映射，
+鉴权时直接在映射内存上二分查找和位运算，不访问数据库，每台机器只占用一份内存
+
+文件布局（小端）：
+    header      | 魔数、格式版本、代数(generation)、授权变更序号、各段数量和偏移
+    strings     | 权限名称、路径、方法的 UTF-8 字节
+    permissions | 每个权限一条 (name_off, name_len, path_off, path_len, method_off, method_len)，下标即 bit
+    roles       | 每个角色一条 (role_id, flags, name_off, name_len)，按 role_id 排序
+    masks       | 每个角色一个定长的权限掩码
+    users       | 每个用户一条 (user_id, start, count)，按 user_id 排序
+    user_roles  | 用户持有的角色下标
+
+写入时先写临时文件再原子替换，然后更新 .gen 控制文件中的代数；读取方只读取控制文件中的8个字节，
+发现代数变化后重新映射快照文件
+快照记录构建前读取的授权变更序号（AuthzVersions.serial），鉴权时与当前序号比较，
+授权数据变更后、新快照发布前（或重建失败时）快照被视为过期，鉴权退回授权缓存，撤销的权限立即生效
+只支持提供 fcntl 的系统（Linux/macOS）
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import time
+from logging import getLogger
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.rbac_core.associations import role_closure, role_permission
+from app.rbac_core.department.grants import user_roles_subquery
+from app.rbac_core.permission.models import Permission
+from app.rbac_core.role.models import Role
+from app.rbac_core.user.models import User
+from app.rbac_core.versions import authz_versions
+
+logger = getLogger(__name__)
+
+_MAGIC = b"RBS1"
+_FORMAT_VERSION = 2
+# 魔数, 格式版本, 代数, 授权变更序号, 权限数, 角色数, 用户数, 掩码字节数, 各段偏移
+_HEADER = struct.Struct("<4sIQQIIIIQQQQQQ")
+_PERMISSION = struct.Struct("<IIIIII")
+_ROLE = struct.Struct("<qIII")
+_USER = struct.Struct("<qII")
+_ROLE_INDEX = struct.Struct("<I")
+_GENERATION = struct.Struct("<Q")
+_NONE = 0xFFFFFFFF
+_FLAG_SUPERADMIN = 1
+
+# 进程启动时间，启动时快照文件比它旧才需要重建
+_PROCESS_STARTED_AT = time.time()
+
+
+class _StringTable:
+    def __init__(self):
+        self.buffer = bytearray()
+        self._offsets: dict[str, tuple[int, int]] = {}
+
+    def add(self, value: str | None) -> tuple[int, int]:
+        if value is None:
+            return _NONE, 0
+        if value not in self._offsets:
+            encoded = value.encode("utf-8")
+            self._offsets[value] = (len(self.buffer), len(encoded))
+            self.buffer += encoded
+        return self._offsets[value]
+
+
+async def build_snapshot(db: AsyncSession, generation: int, serial: int, super_admin_role: str) -> bytes:
+    """
+    查询完整的授权关系并编码为快照，只查询必要的列
+    serial: 查询前读取的授权变更序号
+    """
+    strings = _StringTable()
+
+    perm_result = await db.execute(select(Permission.id, Permission.name, Permission.api_path, Permission.api_method).order_by(Permission.id))
+    permission_bits: dict[int, int] = {}
+    permissions = bytearray()
+    for bit, (permission_id, name, api_path, api_method) in enumerate(perm_result.all()):
+        permission_bits[permission_id] = bit
+        permissions += _PERMISSION.pack(*strings.add(name), *strings.add(api_path), *strings.add(api_method and api_method.upper()))
+    mask_bytes = (len(permission_bits) + 7) // 8
+
+    role_result = await db.execute(select(Role.id, Role.name).order_by(Role.id))
+    role_rows = role_result.all()
+    role_indexes = {role_id: index for index, (role_id, _) in enumerate(role_rows)}
+    role_masks = [0] * len(role_rows)
+    # 角色掩码包含从父角色继承的权限
+    link_result = await db.execute(
+        select(role_closure.c.role_id, role_closure.c.ancestor_id, role_permission.c.permission_id).join(
+            role_permission, role_permission.c.role_id == role_closure.c.ancestor_id
+        )
+    )
+    for role_id, ancestor_id, permission_id in link_result.all():
+        bit = permission_bits.get(permission_id)
+        index = role_indexes.get(role_id)
+        # 角色、父角色或权限已被软删除
+        if bit is not None and index is not None and ancestor_id in role_indexes:
+            role_masks[index] |= 1 << bit
+
+    # 角色自身或任一祖先角色是超级管理员时，该角色也是超级管理员
+    superadmin_result = await db.execute(select(role_closure.c.role_id).join(Role, Role.id == role_closure.c.ancestor_id).where(Role.name == super_admin_role))
+    superadmin_roles = set(superadmin_result.scalars().all())
+
+    roles = bytearray()
+    masks = bytearray()
+    for index, (role_id, role_name) in enumerate(role_rows):
+        flags = _FLAG_SUPERADMIN if role_id in superadmin_roles else 0
+        roles += _ROLE.pack(role_id, flags, *strings.add(role_name))
+        masks += role_masks[index].to_bytes(mask_bytes, "little")
+
+    users = bytearray()
+    user_roles = bytearray()
+    user_count = 0
+    current_user, start, count = None, 0, 0
+    # 用户角色包含部门授予的角色
+    held = user_roles_subquery()
+    stmt = select(held.c.user_id, held.c.role_id).join(User, User.id == held.c.user_id).order_by(held.c.user_id)
+    stream = await db.stream(stmt.execution_options(yield_per=10000))
+    async for user_id, role_id in stream:
+        index = role_indexes.get(role_id)
+        if index is None:
+            continue
+        if user_id != current_user:
+            if current_user is not None:
+                users += _USER.pack(current_user, start, count)
+                user_count += 1
+            current_user, start, count = user_id, len(user_roles) // _ROLE_INDEX.size, 0
+        user_roles += _ROLE_INDEX.pack(index)
+        count += 1
+    if current_user is not None:
+        users += _USER.pack(current_user, start, count)
+        user_count += 1
+
+    strings_off = _HEADER.size
+    perms_off = strings_off + len(strings.buffer)
+    roles_off = perms_off + len(permissions)
+    masks_off = roles_off + len(roles)
+    users_off = masks_off + len(masks)
+    user_roles_off = users_off + len(users)
+    header = _HEADER.pack(
+        _MAGIC, _FORMAT_VERSION, generation, serial, len(permission_bits), len(role_rows), user_count, mask_bytes, strings_off, perms_off, roles_off, masks_off, users_off, user_roles_off
+    )
+    return b"".join((header, strings.buffer, permissions, roles, masks, users, user_roles))
+
+
+class SnapshotView:
+    """
+    映射到内存的快照，用户和角色数据直接在映射内存上读取
+    权限目录（名称/路由 -> bit）在映射时解析为字典，大小只与权限数有关
+    """
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mmap = mapped
+        self._buffer = memoryview(mapped)
+        (magic, version, self.generation, self.serial, n_perms, self.n_roles, self.n_users, self.mask_bytes, strings_off, perms_off, self._roles_off, self._masks_off, self._users_off, self._user_roles_off) = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError("无效的授权快照文件")
+
+        def read_string(offset: int, length: int) -> str | None:
+            if offset == _NONE:
+                return None
+            return bytes(self._buffer[strings_off + offset : strings_off + offset + length]).decode("utf-8")
+
+        self.name_bits: dict[str, int] = {}
+        self.api_bits: dict[tuple[str, str], int] = {}
+        for bit in range(n_perms):
+            name_off, name_len, path_off, path_len, method_off, method_len = _PERMISSION.unpack_from(self._buffer, perms_off + bit * _PERMISSION.size)
+            name = read_string(name_off, name_len)
+            api_path = read_string(path_off, path_len)
+            api_method = read_string(method_off, method_len)
+            self.name_bits[name] = bit  # pyright: ignore
+            if api_path and api_method:
+                self.api_bits[(api_method, api_path)] = bit
+
+    def _user_role_indexes(self, user_id: int) -> list[int]:
+        low, high = 0, self.n_users - 1
+        while low <= high:
+            middle = (low + high) // 2
+            current, start, count = _USER.unpack_from(self._buffer, self._users_off + middle * _USER.size)
+            if current == user_id:
+                base = self._user_roles_off + start * _ROLE_INDEX.size
+                return [_ROLE_INDEX.unpack_from(self._buffer, base + i * _ROLE_INDEX.size)[0] for i in range(count)]
+            if current < user_id:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return []
+
+    def is_superadmin(self, user_id: int) -> bool:
+        for index in self._user_role_indexes(user_id):
+            _, flags, _, _ = _ROLE.unpack_from(self._buffer, self._roles_off + index * _ROLE.size)
+            if flags & _FLAG_SUPERADMIN:
+                return True
+        return False
+
+    def _has_bit(self, user_id: int, bit: int | None) -> bool:
+        if bit is None:
+            return False
+        byte, shift = divmod(bit, 8)
+        for index in self._user_role_indexes(user_id):
+            if (self._buffer[self._masks_off + index * self.mask_bytes + byte] >> shift) & 1:
+                return True
+        return False
+
+    def user_mask(self, user_id: int) -> int:
+        """
+        用户所有角色掩码的按位或
+        """
+        mask = 0
+        for index in self._user_role_indexes(user_id):
+            offset = self._masks_off + index * self.mask_bytes
+            mask |= int.from_bytes(self._buffer[offset : offset + self.mask_bytes], "little")
+        return mask
+
+    def has_api(self, user_id: int, api_path: str, api_method: str) -> bool:
+        return self._has_bit(user_id, self.api_bits.get((api_method.upper(), api_path)))
+
+    def has_name(self, user_id: int, permission_name: str) -> bool:
+        return self._has_bit(user_id, self.name_bits.get(permission_name))
+
+    def close(self) -> None:
+        self._buffer.release()
+        self._mmap.close()
+
+
+class SharedSnapshot:
+    """
+    共享快照的读写入口
+    """
+
+    def __init__(self, path: str, super_admin_role: str):
+        self.path = path
+        self.super_admin_role = super_admin_role
+        self._view: SnapshotView | None = None
+        self._generation_map: mmap.mmap | None = None
+        self._dirty = False
+        self._publisher: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    # ------------------ 读取 ------------------
+    def _read_generation(self) -> int | None:
+        if self._generation_map is None:
+            try:
+                with open(f"{self.path}.gen", "rb") as f:
+                    self._generation_map = mmap.mmap(f.fileno(), _GENERATION.size, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError):
+                return None
+        return _GENERATION.unpack_from(self._generation_map, 0)[0]
+
+    def current(self) -> SnapshotView | None:
+        """
+        返回当前快照，代数变化时重新映射，快照尚未生成时返回 None
+        """
+        generation = self._read_generation()
+        if generation is None:
+            return None
+        if self._view is not None and self._view.generation == generation:
+            return self._view
+        try:
+            with open(self.path, "rb") as f:
+                view = SnapshotView(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        except (FileNotFoundError, ValueError) as exc:
+            logger.warning(f"授权快照映射失败: {exc}")
+            return self._view
+        old, self._view = self._view, view
+        if old is not None:
+            old.close()
+        logger.info(f"映射授权快照，代数{view.generation}，{view.n_roles}个角色，{view.n_users}个用户")
+        return view
+
+    # ------------------ 写入 ------------------
+    async def publish(self, db: AsyncSession, only_if_older_than: float | None = None) -> None:
+        """
+        重建快照，多个进程之间通过文件锁保证同一时间只有一个进程在写
+        only_if_older_than: 快照文件修改时间不早于该时间戳时跳过，用于多个 worker 同时启动
+        """
+        import fcntl
+
+        with open(f"{self.path}.lock", "a") as lock:
+            await asyncio.to_thread(fcntl.flock, lock.fileno(), fcntl.LOCK_EX)
+            try:
+                if only_if_older_than is not None and os.path.exists(self.path) and os.path.getmtime(self.path) >= only_if_older_than:
+                    return
+                generation = (self._read_generation() or 0) + 1
+                # 序号在查询前读取，构建期间发生的变更会使本次快照过期
+                serial = await authz_versions.serial()
+                data = await build_snapshot(db, generation, serial, self.super_admin_role)
+
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+                self._write_generation(generation)
+                logger.info(f"授权快照已发布，代数{generation}，{len(data)}字节")
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _write_generation(self, generation: int) -> None:
+        gen_path = f"{self.path}.gen"
+        if not os.path.exists(gen_path):
+            with open(gen_path, "wb") as f:
+                f.write(_GENERATION.pack(0))
+        # 原地写入8个字节，已经映射该文件的读取方无需重新打开
+        with open(gen_path, "r+b") as f:
+            with mmap.mmap(f.fileno(), _GENERATION.size) as mapped:
+                _GENERATION.pack_into(mapped, 0, generation)
+
+    async def publish_on_startup(self, db: AsyncSession) -> None:
+        """
+        应用启动时调用，快照文件早于本进程启动才重建，同时启动的多个 worker 只有一个会真正构建
+        """
+        await self.publish(db, only_if_older_than=_PROCESS_STARTED_AT)
+
+    def schedule_publish(self) -> None:
+        """
+        授权数据变更后调用，在后台重建快照，重建期间的多次变更合并为一次
+        """
+        self._dirty = True
+        if self._publisher is not None and not self._publisher.done():
+            return
+        try:
+            self._publisher = asyncio.get_running_loop().create_task(self._publish_loop())
+        except RuntimeError:
+            logger.warning("没有运行中的事件循环，跳过授权快照重建")
+
+    async def _publish_loop(self) -> None:
+        from app.core.database import AsyncSessionLocal
+
+        while self._dirty:
+            self._dirty = False
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.publish(db)
+            except Exception as exc:
+                logger.error(f"授权快照重建失败: {exc}")
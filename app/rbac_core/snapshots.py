@@ -0,0 +1,80 @@
+"""
+授权缓存记录
+全部为基于元组的不可变记录，不持有ORM对象，缓存按估算的字节数限制容量
+"""
+
+import sys
+from typing import NamedTuple
+
+from app.rbac_core.permission_bitmap import PermissionBitmap, PermissionTuple
+
+# 缓存本身（LRU链表、字典槽位）的估算开销
+_ENTRY_OVERHEAD = 100
+
+
+class RoleSnapshot(NamedTuple):
+    """
+    角色快照，所有持有该角色的用户共享同一份
+    """
+
+    role_id: int
+    name: str
+    is_superadmin: bool
+    # 引用位图中的权限元组，不单独占用内存
+    permissions: tuple[PermissionTuple, ...]
+    # 构建快照时使用的位图，掩码只在该位图上有效
+    bitmap: PermissionBitmap
+    mask: int
+    # 构建前读取到的版本号，见 AuthzVersions.current
+    stamp: tuple[int, ...]
+
+
+class UserRoles(NamedTuple):
+    """
+    用户持有的角色ID，按ID排序，角色集合相同的用户可以共享同一个 RoleSetGrant
+    """
+
+    user_id: int
+    role_ids: tuple[int, ...]
+    # 构建前读取到的版本号，见 AuthzVersions.current
+    stamp: tuple[int, ...]
+
+
+class UserDepartments(NamedTuple):
+    """
+    用户所在部门的树路径，按路径排序，用于计算数据范围
+    """
+
+    user_id: int
+    paths: tuple[str, ...]
+    # 构建前读取到的版本号，见 AuthzVersions.current
+    stamp: tuple[int, ...]
+
+
+class RoleSetGrant(NamedTuple):
+    """
+    一组角色合并后的授权结果
+    """
+
+    bitmap: PermissionBitmap
+    is_superadmin: bool
+    mask: int
+    # 构建前读取到的版本号，见 AuthzVersions.current
+    stamp: tuple[int, ...]
+
+
+def sizeof_role_snapshot(snapshot: RoleSnapshot) -> int:
+    return _ENTRY_OVERHEAD + sys.getsizeof(snapshot) + sys.getsizeof(snapshot.permissions) + sys.getsizeof(snapshot.mask) + sys.getsizeof(snapshot.stamp)
+
+
+def sizeof_user_roles(user_roles: UserRoles) -> int:
+    return _ENTRY_OVERHEAD + sys.getsizeof(user_roles) + sys.getsizeof(user_roles.role_ids) + 28 * len(user_roles.role_ids) + sys.getsizeof(user_roles.stamp)
+
+
+def sizeof_user_departments(departments: UserDepartments) -> int:
+    return _ENTRY_OVERHEAD + sys.getsizeof(departments) + sys.getsizeof(departments.paths) + sum(sys.getsizeof(p) for p in departments.paths) + sys.getsizeof(departments.stamp)
+
+
+def sizeof_role_set_grant(grant: RoleSetGrant) -> int:
+    # key 为角色ID元组，也计入
+    return _ENTRY_OVERHEAD + sys.getsizeof(grant) + sys.getsizeof(grant.mask) + sys.getsizeof(grant.stamp) + 64
@@ -2,13 +2,16 @@ from logging import getLogger
 from typing import Sequence
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import noload, selectinload
 
+from app.core.data_scope import DataScope
 from app.core.exception_handler import AppException
 from app.core.schemas import PaginatedResult, PaginationParams
 from app.core.security import get_password_hash
-from app.rbac_core import rbac
+from app.rbac_core import effective, rbac
+from app.rbac_core.associations import user_effective_permission
 from app.rbac_core.permission.models import Permission
+from app.rbac_core.permission.services import permission_service
 from app.rbac_core.role.services import role_service
 
 from .models import User
@@ -18,12 +21,12 @@ from .services import user_service
 logger = getLogger(__name__)
 
 
-async def get_all_users(db: AsyncSession, pp: PaginationParams, filters: UserFilter) -> PaginatedResult[UserRead]:
-    """获取所有用户列表"""
+async def get_all_users(db: AsyncSession, pp: PaginationParams, filters: UserFilter, scope: DataScope | None = None) -> PaginatedResult[UserRead]:
+    """获取用户列表，传入 scope 时只返回数据范围内的用户"""
 
     filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
     logger.info(filters_dict)
-    all_users = await user_service.paginate(db, **pp.model_dump(), **filters_dict)
+    all_users = await user_service.paginate(db, **pp.model_dump(), scope=scope, **filters_dict)
     return all_users
 
 
@@ -66,6 +69,7 @@ async def update_user(db: AsyncSession, user_id: int, user_in: UserUpdate) -> Us
     update_data = user_in.model_dump(exclude_unset=True, exclude_none=True)
 
     await user_service.crud.update(db, user, update_data)
+    await rbac.invalidate_users([user_id])
 
     return user
 
@@ -75,9 +79,12 @@ async def delete_user(db: AsyncSession, user_id: int):
     user = await user_service.crud.get_by_id(db, user_id)
     if not user:
         raise AppException(status_code=404, detail="用户不存在")
-    is_deleted = await user_service.crud.delete(db, user)
+    is_deleted = await user_service.crud.delete(db, user, commit=False)
     if not is_deleted:
         raise AppException(status_code=500, detail="用户删除失败")
+    await effective.refresh_users(db, [user_id])
+    await db.commit()
+    await rbac.invalidate_users([user_id])
     return True
 
 
@@ -94,13 +101,21 @@ async def assign_role_to_user(db: AsyncSession, user_id: int, role_in: RoleAssig
 
     # 为用户分配角色
     user.roles = await role_service.crud.list_by_filter(db, id__in=role_in.role_id_list)
+    await effective.refresh_users(db, [user_id])
 
     await db.commit()
+    await rbac.invalidate_users([user_id])
 
     return user
 
 
 async def get_user_permissions(db: AsyncSession, user_id: int) -> Sequence[Permission]:
     """获取用户权限"""
-    permissions = await rbac.get_user_permissions(db, user_id)
-    return permissions
+    # 有效权限表已经展开了 用户 -> 角色 -> 权限，按 user_id 一次索引查找
+    stmt = (
+        permission_service.crud.get_select_stmt(options=[noload(Permission.roles)])
+        .join(user_effective_permission, user_effective_permission.c.permission_id == Permission.id)
+        .where(user_effective_permission.c.user_id == user_id)
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.depends import db_depends, login_depends, pagination_params_depends, default_permission_depends
+from app.core.data_scope import DataScope
+from app.core.depends import data_scope_depends, db_depends, login_depends, pagination_params_depends, default_permission_depends
+from app.core.responses import paginated_response
 from app.core.schemas import PaginatedResult, PaginationParams
 from app.rbac_core.permission.schemas import PermissionRead
 
@@ -11,9 +13,15 @@ router = APIRouter(prefix="/users", tags=["用户"], dependencies=[login_depends
 
 
 @router.get("/", response_model=PaginatedResult[schemas.UserRead], summary="获取用户列表", description="获取所有用户",name="user:list")
-async def get_users(db: AsyncSession = db_depends, pagination_params: PaginationParams = pagination_params_depends, filters: schemas.UserFilter = Depends()):
-    """获取用户列表"""
-    return await controllers.get_all_users(db, pp=pagination_params, filters=filters)
+async def get_users(
+    db: AsyncSession = db_depends,
+    pagination_params: PaginationParams = pagination_params_depends,
+    filters: schemas.UserFilter = Depends(),
+    scope: DataScope = data_scope_depends,
+):
+    """获取用户列表，只返回当前用户数据范围内的用户"""
+    result = await controllers.get_all_users(db, pp=pagination_params, filters=filters, scope=scope)
+    return paginated_response(result) if pagination_params.fields else result
 
 
 @router.get("/{user_id}", response_model=schemas.UserReadWithRoles, summary="根据用户ID获取用户", description="根据用户ID获取用户详情",name="user:detail")
@@ -1,4 +1,9 @@
+from sqlalchemy import ColumnElement, or_, select
+
+from app.core.data_scope import DataScope
 from app.core.query_service import QueryService
+from app.rbac_core.associations import user_department
+from app.rbac_core.department.models import Department
 
 from .models import User
 from .schemas import UserRead
@@ -15,4 +20,25 @@ from .schemas import UserRead
 #
 # user_crud:CRUDService[User,UserRead] = UserService()
 
-user_service: QueryService[User, UserRead] = QueryService(model=User, schema=UserRead)
+
+
+def user_scope_filter(scope: DataScope) -> ColumnElement[bool]:
+    """
+    当前用户自己，或属于数据范围内的任一部门：
+    EXISTS (SELECT 1 FROM rbac_user_department JOIN rbac_departments ... WHERE path LIKE '/1/3/%')
+    按 user_id 走 rbac_user_department 主键，再按部门主键取路径，不需要先展开子树
+    不属于任何部门的用户只能看到自己
+    """
+    own = User.id == scope.user_id
+    if not scope.department_paths:
+        return own
+    in_departments = (
+        select(1)
+        .select_from(user_department.join(Department, user_department.c.department_id == Department.id))
+        .where(user_department.c.user_id == User.id, scope.path_condition(Department.path))
+        .exists()
+    )
+    return or_(own, in_departments)
+
+
+user_service: QueryService[User, UserRead] = QueryService(model=User, schema=UserRead, scope_filter=user_scope_filter)
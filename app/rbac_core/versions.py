@@ -0,0 +1,58 @@
+from typing import Iterable, Sequence
+
+from app.core.cache import CacheBackend, cache
+
+_EPOCH_KEY = "rbac:v:epoch"
+# 授权变更序号，任何授权数据变更都会递增
+_SERIAL_KEY = "rbac:v:serial"
+
+
+def _role_key(role_id: int) -> str:
+    return f"rbac:v:role:{role_id}"
+
+
+def _user_key(user_id: int) -> str:
+    return f"rbac:v:user:{user_id}"
+
+
+class AuthzVersions:
+    """
+    授权数据版本号
+    版本号计数器保存在缓存后端中，使用共享后端时多个进程、多个节点看到同一组版本号：
+    全局epoch、每个角色、每个用户各有一个计数器，写操作后递增。
+    缓存条目记录构建前读取到的版本号(stamp)，与当前版本号一致才有效，不再依赖TTL过期
+    """
+
+    __slots__ = ("cache",)
+
+    def __init__(self, cache: CacheBackend):
+        self.cache = cache
+
+    async def current(self, user_id: int | None = None, role_ids: Sequence[int] = ()) -> tuple[int, ...]:
+        """
+        一次读取当前版本号，返回 (epoch, [用户版本号], *角色版本号)
+        """
+        keys = [_EPOCH_KEY]
+        if user_id is not None:
+            keys.append(_user_key(user_id))
+        keys.extend(_role_key(role_id) for role_id in role_ids)
+        return await self.cache.version(*keys)
+
+    async def serial(self) -> int:
+        """
+        读取授权变更序号，共享快照记录构建前的序号，与当前序号不一致说明快照已落后
+        """
+        (value,) = await self.cache.version(_SERIAL_KEY)
+        return value
+
+    async def bump_epoch(self) -> None:
+        await self.cache.bump(_EPOCH_KEY, _SERIAL_KEY)
+
+    async def bump_roles(self, role_ids: Iterable[int]) -> None:
+        await self.cache.bump(*(_role_key(role_id) for role_id in role_ids), _SERIAL_KEY)
+
+    async def bump_users(self, user_ids: Iterable[int]) -> None:
+        await self.cache.bump(*(_user_key(user_id) for user_id in user_ids), _SERIAL_KEY)
+
+
+authz_versions = AuthzVersions(cache)
@@ -18,3 +18,12 @@ def sync_api_permissions():
     """
     from .collect_api_permissions import sync_api_permissions
     sync_api_permissions()
+
+
+@app.command("rebuild-effective-permissions")
+def rebuild_effective_permissions(dry_run: bool = typer.Option(False, "--dry-run", help="只报告差异，不修改数据")):
+    """
+    重建用户有效权限表，并报告与角色权限数据的差异
+    """
+    from .rebuild_effective_permissions import rebuild_effective_permissions_sync
+    rebuild_effective_permissions_sync(dry_run=dry_run)
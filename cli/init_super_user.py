@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
+from app.rbac_core.rbac import SUPER_ADMIN_ROLE
 from app.rbac_core.role.models import Role
 from app.rbac_core.user.models import User
 from app.core.security import get_password_hash
@@ -14,7 +15,6 @@ from app.config import settings
 
 SUPER_ADMIN_USERNAME = settings.SUPER_ADMIN_USERNAME
 SUPER_ADMIN_PASSWORD = settings.SUPER_ADMIN_PASSWORD
-SUPER_ADMIN_ROLE = "super_admin"
 
 
 async def init_super_user(db: AsyncSession):
@@ -0,0 +1,22 @@
+import asyncio
+
+import typer
+
+from app.core.database import AsyncSessionLocal
+from app.rbac_core import effective
+
+
+def rebuild_effective_permissions_sync(dry_run: bool = False):
+    """重建用户有效权限表-同步"""
+
+    async def _run():
+        async with AsyncSessionLocal() as db:
+            missing, extra = await effective.drift(db)
+            typer.echo(f"有效权限表差异：缺失 {missing} 行，多余 {extra} 行")
+            if dry_run or not (missing or extra):
+                return
+            inserted, deleted = await effective.rebuild(db)
+            await db.commit()
+            typer.echo(f"有效权限表已重建：插入 {inserted} 行，删除 {deleted} 行")
+
+    asyncio.run(_run())
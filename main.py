@@ -5,10 +5,13 @@ from logging import getLogger
 
 from app import model_loader  #  加载所有模型,不能删掉
 from app.config import settings
-from app.core.database import engine
+from app.core.database import AsyncSessionLocal, engine
 from app.core.exception_handler import  general_exception_handler
 from app.core.apis import router as api_router
 from app.core.logging import setup_logging
+from app.core.responses import DefaultJSONResponse
+from app.core.route_matcher import route_matcher
+from app.rbac_core.rbac import shared_snapshot
 
 
 
@@ -23,6 +26,12 @@ logger = getLogger(__name__)
 async def lifespan(app: FastAPI):
     # 👉 启动逻辑
     logger.info("应用启动...")
+    # 根据路由表构建路由模板匹配器
+    route_matcher.build(app.routes)
+    # 启用共享授权快照时，由最先拿到文件锁的 worker 构建
+    if shared_snapshot.enabled:
+        async with AsyncSessionLocal() as db:
+            await shared_snapshot.publish_on_startup(db)
     yield
     # 👉 关闭逻辑
     logger.info("关闭数据库引擎...")
@@ -30,7 +39,7 @@ async def lifespan(app: FastAPI):
     logger.info("应用关闭完成")
 
 # 创建 FastAPI 应用实例
-app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan, default_response_class=DefaultJSONResponse)
 
 # 注册全局异常处理函数, 处理所有未捕获的异常
 app.add_exception_handler(Exception, general_exception_handler)
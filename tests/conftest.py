@@ -0,0 +1,70 @@
+import os
+import tempfile
+
+# 配置在导入 app 之前设置，测试使用临时 SQLite 文件和进程内缓存
+_tmpdir = tempfile.mkdtemp(prefix="rbac-test-")
+os.environ.setdefault("DATABASE_URL", f"sqlite+aiosqlite:///{_tmpdir}/test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("APP_NAME", "rbac-test")
+os.environ.setdefault("CACHE_BACKEND", "memory")
+os.environ.setdefault("RBAC_SNAPSHOT_PATH", "")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _reset_caches() -> None:
+    """
+    清空进程内缓存和版本号，每个测试的数据库都是新建的，主键会重复
+    """
+    from app.core.cache import cache
+    from app.rbac_core import rbac
+
+    cache._data.clear()
+    cache._versions.clear()
+    for lru in (rbac.role_cache, rbac.grant_cache, rbac.user_role_cache, rbac.user_department_cache, rbac.bitmap_cache):
+        lru.clear()
+
+
+@pytest.fixture
+async def db():
+    """
+    每个测试使用新建的表，结束后删除
+    """
+    from app import model_loader  # noqa: F401  加载所有模型
+    from app.core.database import AsyncSessionLocal, Base, engine
+
+    _reset_caches()
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        yield session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture
+async def seed(db):
+    """
+    admin 为超级管理员；bob 的角色 viewer 拥有 user:list、user:detail；eve 没有角色
+    """
+    from app.rbac_core import Permission, Role, User
+
+    super_admin = Role(name="super_admin")
+    viewer = Role(name="viewer")
+    viewer.permissions = [
+        Permission(name="user:list", api_path="/rbac/users/", api_method="GET"),
+        Permission(name="user:detail", api_path="/rbac/users/{user_id}", api_method="GET"),
+    ]
+    admin = User(username="admin", hashed_password="x", roles=[super_admin])
+    bob = User(username="bob", hashed_password="x", roles=[viewer])
+    eve = User(username="eve", hashed_password="x")
+    db.add_all([admin, bob, eve])
+    await db.commit()
+    return {"admin": admin, "bob": bob, "eve": eve, "super_admin": super_admin, "viewer": viewer}
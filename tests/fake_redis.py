@@ -0,0 +1,89 @@
+"""
+测试用的 Redis 协议(RESP)服务端，只实现 RedisCache 用到的命令
+"""
+
+import asyncio
+
+
+class FakeRedis:
+    def __init__(self, password: str | None = None):
+        self.password = password
+        self.data: dict[bytes, bytes] = {}
+        # 按顺序记录收到的命令
+        self.commands: list[list[bytes]] = []
+        # 这些 key 的命令收到后暂停回复，直到 release 被设置
+        self.hold_keys: set[bytes] = set()
+        self.held = asyncio.Event()
+        self.release = asyncio.Event()
+        self.connections = 0
+        self._writers: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self._server.sockets[0].getsockname()[1]
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{port}/0"
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # 客户端没有关闭的连接由服务端关闭，否则 wait_closed 会一直等待
+            for writer in self._writers:
+                writer.close()
+            await self._server.wait_closed()
+
+    @staticmethod
+    def _bulk(value: bytes | None) -> bytes:
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _reply(self, args: list[bytes], state: dict) -> bytes:
+        cmd = args[0].upper()
+        if cmd == b"AUTH":
+            if args[1].decode() != self.password:
+                return b"-WRONGPASS invalid password\r\n"
+            state["authed"] = True
+            return b"+OK\r\n"
+        if self.password and not state.get("authed"):
+            return b"-NOAUTH Authentication required.\r\n"
+        if cmd == b"SELECT":
+            return b"+OK\r\n"
+        if cmd == b"GET":
+            return self._bulk(self.data.get(args[1]))
+        if cmd == b"MGET":
+            return b"*%d\r\n" % (len(args) - 1) + b"".join(self._bulk(self.data.get(key)) for key in args[1:])
+        if cmd == b"SET":
+            self.data[args[1]] = args[2]
+            return b"+OK\r\n"
+        if cmd == b"DEL":
+            return b":%d\r\n" % sum(self.data.pop(key, None) is not None for key in args[1:])
+        if cmd == b"INCR":
+            try:
+                value = int(self.data.get(args[1], b"0")) + 1
+            except ValueError:
+                return b"-ERR value is not an integer or out of range\r\n"
+            self.data[args[1]] = str(value).encode()
+            return b":%d\r\n" % value
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.add(writer)
+        state: dict = {}
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    length = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(args)
+                if len(args) > 1 and args[1] in self.hold_keys:
+                    self.held.set()
+                    await self.release.wait()
+                writer.write(self._reply(args, state))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
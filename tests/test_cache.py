@@ -0,0 +1,97 @@
+import asyncio
+
+import anyio
+import pytest
+
+from app.core.cache import CacheError, LocalCache, MemoryCache, RedisCache
+from tests.fake_redis import FakeRedis
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def fake():
+    server = FakeRedis(password="secret")
+    yield server
+    server.release.set()
+    await server.stop()
+
+
+@pytest.fixture
+async def redis(fake):
+    client = RedisCache(await fake.start())
+    # 连接与响应错位时请求会一直等待，用超时让测试失败而不是挂起
+    with anyio.fail_after(5):
+        yield client
+    client._reset()
+
+
+async def test_redis_get_set_delete(redis: RedisCache):
+    assert await redis.get("a") is None
+    await redis.set("a", {"x": [1, 2]})
+    await redis.set("b", 3, ttl=10)
+    assert await redis.get("a") == {"x": [1, 2]}
+    assert await redis.get_many(["a", "missing", "b"]) == [{"x": [1, 2]}, None, 3]
+    await redis.delete("a", "b")
+    assert await redis.get_many(["a", "b"]) == [None, None]
+
+
+async def test_redis_bump_is_pipelined(redis: RedisCache, fake: FakeRedis):
+    assert await redis.version("v1", "v2") == (0, 0)
+    await redis.bump("v1", "v2", "v1")
+    assert await redis.version("v1", "v2", "v3") == (2, 1, 0)
+    # 认证和三个 INCR 都在同一条连接上
+    assert fake.connections == 1
+    assert [c[0] for c in fake.commands].count(b"INCR") == 3
+
+
+async def test_redis_wrong_password(fake: FakeRedis):
+    url = await fake.start()
+    client = RedisCache(url.replace("secret", "wrong"))
+    with pytest.raises(CacheError, match="WRONGPASS"), anyio.fail_after(5):
+        await client.get("a")
+    assert client._writer is None
+
+
+async def test_redis_error_reply_drains_pipeline(redis: RedisCache, fake: FakeRedis):
+    await redis.set("a", "value-a")
+    fake.data[b"bad"] = b"not-a-number"
+    # 中间的命令返回错误，后面的命令仍然执行，其响应被读完
+    with pytest.raises(CacheError, match="not an integer"):
+        await redis.bump("v1", "bad", "v2")
+    assert await redis.version("v1", "v2") == (1, 1)
+    assert await redis.get("a") == "value-a"
+
+
+async def test_redis_cancelled_request_does_not_desync(redis: RedisCache, fake: FakeRedis):
+    await redis.set("slow", "slow-value")
+    await redis.set("fast", "fast-value")
+    fake.hold_keys.add(b"slow")
+
+    task = asyncio.create_task(redis.get("slow"))
+    await fake.held.wait()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    fake.release.set()
+
+    # 被取消的请求的响应不能被后续请求读到
+    assert await redis.get("fast") == "fast-value"
+    assert await redis.get_many(["slow", "fast"]) == ["slow-value", "fast-value"]
+    assert fake.connections == 2
+
+
+async def test_redis_connection_refused():
+    client = RedisCache("redis://127.0.0.1:1/0")
+    with pytest.raises(CacheError, match="Redis连接失败"):
+        await client.get("a")
+
+
+@pytest.mark.parametrize("factory", [MemoryCache, lambda: LocalCache(":memory:")], ids=["memory", "local"])
+async def test_versions_and_ttl(factory):
+    backend = factory()
+    await backend.bump("k", "k")
+    assert await backend.version("k", "other") == (2, 0)
+    await backend.set("x", [1], ttl=0)
+    await backend.set("y", [2])
+    assert await backend.get_many(["x", "y"]) == [None, [2]]
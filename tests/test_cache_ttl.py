@@ -0,0 +1,39 @@
+import pytest
+from cachetools import TTLCache
+from sqlalchemy import delete
+
+from app.config import settings
+from app.rbac_core import rbac
+from app.rbac_core.associations import user_role
+
+pytestmark = pytest.mark.anyio
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def test_ttl_bounds_unannounced_changes(db, seed, monkeypatch):
+    """
+    memory 后端的版本号只在本进程内递增，其他 worker 的变更在这里看不到，最迟过期后生效
+    """
+    clock = _Clock()
+    for name in ("role_cache", "grant_cache", "user_role_cache", "user_department_cache", "bitmap_cache"):
+        lru = getattr(rbac, name)
+        assert lru.ttl == settings.RBAC_CACHE_TTL_SECONDS
+        monkeypatch.setattr(rbac, name, TTLCache(maxsize=lru.maxsize, ttl=settings.RBAC_CACHE_TTL_SECONDS, timer=clock, getsizeof=lru.getsizeof))
+
+    bob = seed["bob"]
+    assert await rbac.check_user_permission_by_name(db, bob.id, "user:list")
+
+    # 模拟另一个 worker 撤销了 bob 的角色，本进程的版本号没有变化
+    await db.execute(delete(user_role).where(user_role.c.user_id == bob.id))
+    await db.commit()
+    assert await rbac.check_user_permission_by_name(db, bob.id, "user:list")
+
+    clock.now += settings.RBAC_CACHE_TTL_SECONDS + 1
+    assert not await rbac.check_user_permission_by_name(db, bob.id, "user:list")
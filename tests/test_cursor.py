@@ -0,0 +1,60 @@
+import base64
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.core.cursor import decode_cursor, encode_cursor
+from app.core.exception_handler import AppException
+
+
+@pytest.mark.parametrize(
+    "value, python_type",
+    [
+        (datetime(2024, 5, 1, 8, 30, 15, 123456, tzinfo=timezone.utc), datetime),
+        (42, int),
+        (Decimal("12.50"), Decimal),
+        ("名称,带逗号", str),
+        (None, int),
+    ],
+)
+def test_round_trip(value, python_type):
+    cursor = encode_cursor("created_at", value, 7)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "created_at", python_type) == (value, 7)
+
+
+def _raw(payload: bytes) -> str:
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "!!!",
+        "",
+        _raw(b"not json"),
+        _raw(b'["id",1]'),
+        _raw(b'{"id":1}'),
+        _raw(b'["created_at","yesterday",1]'),
+        _raw(b'["created_at","2024-05-01T00:00:00","x"]'),
+    ],
+)
+def test_invalid_cursor(cursor):
+    with pytest.raises(AppException) as exc:
+        decode_cursor(cursor, "created_at", datetime)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "无效的游标"
+
+
+def test_order_by_mismatch():
+    cursor = encode_cursor("id", 5, 5)
+    with pytest.raises(AppException) as exc:
+        decode_cursor(cursor, "created_at", datetime)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "游标与排序字段不一致"
+
+
+def test_unsupported_value():
+    with pytest.raises(TypeError):
+        encode_cursor("id", object(), 1)
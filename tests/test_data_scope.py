@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import insert
+
+from app.rbac_core import Department, User, rbac
+from app.rbac_core.associations import user_department
+from app.rbac_core.user.services import user_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def _visible(db, user_id: int) -> list[str]:
+    scope = await rbac.get_data_scope(db, user_id)
+    result = await user_service.paginate(db, size=100, order_by="id", scope=scope)
+    return [user.username for user in result.items]
+
+
+@pytest.fixture
+async def departments(db, seed):
+    """
+    /1/ 下有 /1/2/，/3/ 独立；bob 在 /1/，carol 在 /1/2/，dan 在 /3/，eve 不属于任何部门
+    """
+    carol, dan = User(username="carol", hashed_password="x"), User(username="dan", hashed_password="x")
+    db.add_all([Department(id=1, name="a", path="/1/"), Department(id=2, name="b", parent_id=1, path="/1/2/"), Department(id=3, name="c", path="/3/"), carol, dan])
+    await db.flush()
+    members = [(seed["bob"].id, 1), (carol.id, 2), (dan.id, 3)]
+    await db.execute(insert(user_department), [{"user_id": u, "department_id": d} for u, d in members])
+    await db.commit()
+    return {"carol": carol, "dan": dan}
+
+
+async def test_department_subtree(db, seed, departments):
+    assert await _visible(db, seed["bob"].id) == ["bob", "carol"]
+    assert await _visible(db, departments["carol"].id) == ["carol"]
+    assert await _visible(db, departments["dan"].id) == ["dan"]
+
+
+async def test_without_department_sees_only_self(db, seed, departments):
+    scope = await rbac.get_data_scope(db, seed["eve"].id)
+    assert not scope.unrestricted and scope.department_paths == ()
+    assert await _visible(db, seed["eve"].id) == ["eve"]
+
+
+async def test_superadmin_unrestricted(db, seed, departments):
+    assert await _visible(db, seed["admin"].id) == ["admin", "bob", "eve", "carol", "dan"]
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import CacheError, cache
+from app.core.data_versions import data_versions
+from app.rbac_core import Role, User
+from app.rbac_core.user.services import user_service
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_orm_write_bumps_table(db, seed):
+    before = await data_versions.current("rbac_users", "rbac_roles")
+    db.add(User(username="carol", hashed_password="x"))
+    await db.commit()
+    assert await data_versions.current("rbac_users", "rbac_roles") == (before[0] + 1, before[1])
+
+
+async def test_many_to_many_bumps_secondary_table(db, seed):
+    eve = seed["eve"]
+    await db.refresh(eve, ["roles"])
+    (before,) = await data_versions.current("rbac_user_role")
+    eve.roles = [seed["viewer"]]
+    await db.commit()
+    assert await data_versions.current("rbac_user_role") == (before + 1,)
+
+
+async def test_bulk_write_bumps_table(db, seed):
+    (before,) = await data_versions.current("rbac_users")
+    await user_service.crud.bulk_update_by_filter(db, {"is_active": False}, username="eve")
+    await user_service.crud.bulk_delete(db, ids=[seed["eve"].id])
+    assert await data_versions.current("rbac_users") == (before + 2,)
+
+
+async def test_rollback_does_not_bump(db, seed):
+    (before,) = await data_versions.current("rbac_roles")
+    db.add(Role(name="temp"))
+    await db.flush()
+    await db.rollback()
+    await db.commit()
+    assert await data_versions.current("rbac_roles") == (before,)
+
+
+async def test_commit_survives_backend_error(db, seed, monkeypatch):
+    (before,) = await data_versions.current("rbac_users")
+    original = cache.bump
+    calls = []
+
+    async def flaky_bump(*keys):
+        calls.append(keys)
+        if len(calls) == 1:
+            raise CacheError("backend down")
+        await original(*keys)
+
+    monkeypatch.setattr(cache, "bump", flaky_bump)
+    db.add(User(username="frank", hashed_password="x"))
+    # 事务已经提交，递增失败不能让 commit 抛出异常
+    await db.commit()
+    assert await user_service.crud.get_or_none(db, username="frank") is not None
+    assert await data_versions.current("rbac_users") == (before,)
+
+    # 后台重试后版本号递增
+    await asyncio.sleep(0.3)
+    assert await data_versions.current("rbac_users") == (before + 1,)
+    assert len(calls) == 2
@@ -0,0 +1,83 @@
+import pytest
+from fastapi import HTTPException
+
+from app.rbac_core.department import controllers, subtree
+from app.rbac_core.department.models import Department
+from app.rbac_core.department.schemas import DepartmentMoveSchema, DepartmentUpdateSchema
+from app.rbac_core.department.services import department_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def tree(db):
+    """
+    1
+    ├── 2
+    │   └── 4
+    └── 3
+    5
+    """
+    rows = [(1, None, "/1/"), (2, 1, "/1/2/"), (3, 1, "/1/3/"), (4, 2, "/1/2/4/"), (5, None, "/5/")]
+    db.add_all([Department(id=id, name=f"d{id}", parent_id=parent_id, path=path) for id, parent_id, path in rows])
+    await db.commit()
+
+
+async def _paths(db, include_deleted: bool = False) -> dict[int, str]:
+    departments = [await subtree.get_including_deleted(db, id) for id in range(1, 6)] if include_deleted else await department_service.crud.list_by_filter(db)
+    for department in departments:
+        await db.refresh(department)
+    return {d.id: d.path for d in departments if d is not None}
+
+
+async def test_move_rewrites_subtree(db, tree):
+    await controllers.move_department(2, DepartmentMoveSchema(parent_id=5), db)
+    assert await _paths(db) == {1: "/1/", 2: "/5/2/", 3: "/1/3/", 4: "/5/2/4/", 5: "/5/"}
+    assert (await department_service.crud.get_by_id(db, 2)).parent_id == 5
+
+    await controllers.move_department(2, DepartmentMoveSchema(parent_id=None), db)
+    assert (await _paths(db))[4] == "/2/4/"
+
+
+async def test_move_into_own_subtree_rejected(db, tree):
+    for parent_id in (1, 4):
+        with pytest.raises(HTTPException) as exc:
+            await controllers.move_department(1, DepartmentMoveSchema(parent_id=parent_id), db)
+        assert exc.value.status_code == 400
+    await db.rollback()
+    assert (await _paths(db))[4] == "/1/2/4/"
+
+
+async def test_update_moves_and_renames_in_one_transaction(db, tree, monkeypatch):
+    await controllers.update_department(2, DepartmentUpdateSchema(name="renamed", parent_id=5), db)
+    department = await department_service.crud.get_by_id(db, 2)
+    assert (department.name, department.path) == ("renamed", "/5/2/")
+
+    async def broken_update(*args, **kwargs):
+        raise RuntimeError("update failed")
+
+    monkeypatch.setattr(department_service.crud, "update", broken_update)
+    with pytest.raises(RuntimeError):
+        await controllers.update_department(2, DepartmentUpdateSchema(name="again", parent_id=1), db)
+    await db.rollback()
+    # 字段更新失败时移动也一起回滚
+    assert (await _paths(db))[2] == "/5/2/"
+
+
+async def test_delete_and_restore_subtree(db, tree):
+    # 先单独删除 4，再删除整棵子树 1
+    await controllers.delete_department(4, db)
+    await controllers.delete_department(1, db)
+    assert await _paths(db) == {5: "/5/"}
+
+    # 上级部门已删除时不能恢复
+    with pytest.raises(HTTPException) as exc:
+        await controllers.restore_department(2, db)
+    assert exc.value.status_code == 400
+    await db.rollback()
+
+    # 恢复 1 时与它一起删除的 2、3 恢复，之前单独删除的 4 保持删除
+    await controllers.restore_department(1, db)
+    assert set(await _paths(db)) == {1, 2, 3, 5}
+    with pytest.raises(HTTPException):
+        await controllers.restore_department(1, db)
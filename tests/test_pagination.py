@@ -0,0 +1,32 @@
+import pytest
+
+from app.rbac_core.user.services import user_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("total_mode", ["estimated", "cached"])
+@pytest.mark.parametrize("wrong_total", [1, 100])
+async def test_has_next_ignores_inaccurate_total(db, seed, monkeypatch, total_mode, wrong_total):
+    """
+    估算的总数、其他进程写入后尚未失效的缓存总数都可能不准确，has_next 不能由它们推算
+    """
+
+    async def inaccurate_total(db, exprs, total_mode):
+        return wrong_total
+
+    monkeypatch.setattr(user_service, "_total", inaccurate_total)
+    first = await user_service.paginate(db, page=1, size=2, order_by="id", total_mode=total_mode)
+    last = await user_service.paginate(db, page=2, size=2, order_by="id", total_mode=total_mode)
+    assert [first.has_next, last.has_next] == [True, False]
+    assert [len(first.items), len(last.items)] == [2, 1]
+    # 总数仍按指定方式返回
+    assert first.total == last.total == wrong_total
+
+
+@pytest.mark.parametrize("total_mode", ["exact", "window", "none"])
+async def test_has_next(db, seed, total_mode):
+    first = await user_service.paginate(db, page=1, size=2, order_by="id", total_mode=total_mode)
+    last = await user_service.paginate(db, page=2, size=2, order_by="id", total_mode=total_mode)
+    assert [first.has_next, last.has_next] == [True, False]
+    assert first.total == (None if total_mode == "none" else 3)
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+from starlette.requests import Request
+
+from app.core import response_cache as response_cache_module
+from app.core.cache import LocalCache, MemoryCache
+from app.core.data_versions import DataVersions
+from app.core.response_cache import ResponseCache
+
+pytestmark = pytest.mark.anyio
+
+TTL = 60
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/rbac/menus/tree", "query_string": b"", "headers": headers})
+
+
+class _Source:
+    """
+    模拟数据库中的数据，build 返回当前内容并记录调用次数
+    """
+
+    def __init__(self):
+        self.body = b"v1"
+        self.builds = 0
+
+    async def build(self) -> bytes:
+        self.builds += 1
+        return self.body
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(response_cache_module, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+async def test_hit_and_not_modified(clock):
+    source = _Source()
+    responses = ResponseCache(DataVersions(MemoryCache()), 1 << 20, TTL)
+
+    first = await responses.respond(_request(), tables=["rbac_menus"], build=source.build)
+    second = await responses.respond(_request(), tables=["rbac_menus"], build=source.build)
+    assert first.body == second.body == b"v1"
+    assert source.builds == 1
+
+    etag = first.headers["etag"]
+    response = await responses.respond(_request(f"W/{etag}"), tables=["rbac_menus"], build=source.build)
+    assert response.status_code == 304
+    assert source.builds == 1
+
+
+async def test_local_write_changes_etag(clock):
+    source = _Source()
+    versions = DataVersions(MemoryCache())
+    responses = ResponseCache(versions, 1 << 20, TTL)
+    etag = (await responses.respond(_request(), tables=["rbac_menus"], build=source.build)).headers["etag"]
+
+    source.body = b"v2"
+    await versions.bump("rbac_menus")
+    response = await responses.respond(_request(etag), tables=["rbac_menus"], build=source.build)
+    assert response.status_code == 200
+    assert response.body == b"v2"
+
+
+async def test_unshared_versions_expire(clock):
+    """
+    memory 后端的版本号只在本进程内递增，另一个 worker 的写操作最迟 ttl 后反映到响应和 ETag 上
+    """
+    source = _Source()
+    other_worker = DataVersions(MemoryCache())
+    responses = ResponseCache(DataVersions(MemoryCache()), 1 << 20, TTL)
+    etag = (await responses.respond(_request(), tables=["rbac_menus"], build=source.build)).headers["etag"]
+
+    source.body = b"v2"
+    await other_worker.bump("rbac_menus")
+    stale = await responses.respond(_request(), tables=["rbac_menus"], build=source.build)
+    assert stale.body == b"v1"
+
+    clock.now += TTL
+    response = await responses.respond(_request(etag), tables=["rbac_menus"], build=source.build)
+    assert response.status_code == 200
+    assert response.body == b"v2"
+    assert response.headers["etag"] != etag
+
+
+async def test_shared_versions_keep_etag(clock, tmp_path):
+    """
+    共享后端的版本号对所有 worker 一致，ETag 只随数据版本号变化
+    """
+    versions = DataVersions(LocalCache(str(tmp_path / "cache.sqlite3")))
+    responses = ResponseCache(versions, 1 << 20, TTL)
+    source = _Source()
+    etag = (await responses.respond(_request(), tables=["rbac_menus"], build=source.build)).headers["etag"]
+
+    clock.now += 10 * TTL
+    response = await responses.respond(_request(etag), tables=["rbac_menus"], build=source.build)
+    assert response.status_code == 304
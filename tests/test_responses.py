@@ -0,0 +1,66 @@
+import importlib
+import json
+import sys
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core import responses
+from app.core.schemas import BaseSchema
+
+pytestmark = pytest.mark.anyio
+
+
+class _Item(BaseSchema):
+    name: str
+
+
+_ITEM = {
+    "id": 1,
+    "name": "部门",
+    # UTC 16:30 为东八区次日 00:30，微秒不输出
+    "created_at": datetime(2024, 5, 1, 16, 30, 15, 999999, tzinfo=timezone.utc),
+    "updated_at": datetime(2024, 5, 2, 8, 0, 0, tzinfo=timezone.utc),
+}
+
+
+async def _get(response_class, path: str) -> bytes:
+    app = FastAPI(default_response_class=response_class)
+
+    @app.get("/model", response_model=_Item)
+    async def with_response_model():
+        return _ITEM
+
+    @app.get("/direct")
+    async def without_response_model():
+        return _Item(**_ITEM)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.get(path)
+    assert response.status_code == 200
+    return response.content
+
+
+def test_orjson_is_default():
+    assert responses.DefaultJSONResponse is ORJSONResponse
+
+
+@pytest.mark.parametrize("path", ["/model", "/direct"])
+async def test_local_datetime_matches(path):
+    orjson_body = await _get(ORJSONResponse, path)
+    json_body = await _get(JSONResponse, path)
+    assert orjson_body == json_body
+    assert json.loads(orjson_body) == {"id": 1, "name": "部门", "created_at": "2024-05-02 00:30:15", "updated_at": "2024-05-02 16:00:00", "deleted_at": None}
+
+
+def test_fallback_without_orjson(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    try:
+        assert importlib.reload(responses).DefaultJSONResponse is JSONResponse
+    finally:
+        monkeypatch.undo()
+        importlib.reload(responses)
+    assert responses.DefaultJSONResponse is ORJSONResponse
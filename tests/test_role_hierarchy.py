@@ -0,0 +1,68 @@
+import pytest
+
+from app.core.exception_handler import AppException
+from app.rbac_core import Role, User, rbac
+from app.rbac_core.role import controllers, hierarchy
+from app.rbac_core.shared_snapshot import SharedSnapshot
+
+pytestmark = pytest.mark.anyio
+
+
+async def _inherit(db, role: Role, parents: list[Role]) -> None:
+    affected = await hierarchy.set_parents(db, role.id, [p.id for p in parents])
+    await db.commit()
+    await rbac.invalidate_roles(affected)
+
+
+async def test_cycle_rejected(db, seed):
+    a, b, c = Role(name="a"), Role(name="b"), Role(name="c")
+    db.add_all([a, b, c])
+    await db.commit()
+    await _inherit(db, b, [a])
+    await _inherit(db, c, [b])
+    assert await hierarchy.get_ancestor_ids(db, c.id) == [b.id, a.id]
+
+    with pytest.raises(AppException) as exc:
+        await hierarchy.set_parents(db, a.id, [c.id])
+    assert exc.value.status_code == 400
+    with pytest.raises(AppException):
+        await hierarchy.set_parents(db, a.id, [a.id])
+
+
+async def test_inherited_permissions(db, seed):
+    child = Role(name="child")
+    carol = User(username="carol", hashed_password="x", roles=[child])
+    db.add(carol)
+    await db.commit()
+    assert not await rbac.check_user_permission_by_name(db, carol.id, "user:list")
+
+    await _inherit(db, child, [seed["viewer"]])
+    assert await rbac.check_user_permission_by_name(db, carol.id, "user:list")
+    assert not await rbac.check_is_superadmin(db, carol.id)
+
+
+async def test_superadmin_is_inherited(db, seed, tmp_path):
+    ops = Role(name="ops")
+    dave = User(username="dave", hashed_password="x", roles=[ops])
+    db.add(dave)
+    await db.commit()
+    assert not await rbac.check_is_superadmin(db, dave.id)
+
+    await _inherit(db, ops, [seed["super_admin"]])
+    assert await rbac.check_is_superadmin(db, dave.id)
+    assert (await rbac.get_data_scope(db, dave.id)).unrestricted
+    context = await rbac.get_authorization_context(db, dave.id)
+    assert context.is_superadmin
+
+    snapshot = SharedSnapshot(str(tmp_path / "authz.bin"), rbac.SUPER_ADMIN_ROLE)
+    await snapshot.publish(db)
+    view = snapshot.current()
+    assert view.is_superadmin(dave.id)
+    assert not view.is_superadmin(seed["bob"].id)
+
+
+async def test_hierarchy_of_missing_role(db, seed):
+    assert (await controllers.get_role_hierarchy(db, seed["viewer"].id)).ancestor_ids == []
+    with pytest.raises(AppException) as exc:
+        await controllers.get_role_hierarchy(db, 999)
+    assert exc.value.status_code == 404
@@ -0,0 +1,28 @@
+import pytest
+from starlette.requests import Request
+
+from app.auth import controllers
+
+pytestmark = pytest.mark.anyio
+
+
+def _request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/auth/routes", "headers": headers})
+
+
+@pytest.mark.parametrize("header", ['{etag}', 'W/{etag}', '"other", {etag}', '"other", W/{etag}', "*"])
+async def test_not_modified(db, seed, header):
+    first = await controllers.get_route_manifest(db, seed["bob"].id, _request())
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    response = await controllers.get_route_manifest(db, seed["bob"].id, _request(header.format(etag=etag)))
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+async def test_changed_etag(db, seed):
+    response = await controllers.get_route_manifest(db, seed["bob"].id, _request('"other", W/"stale"'))
+    assert response.status_code == 200
+    assert b"/rbac/users/" in response.body
@@ -0,0 +1,70 @@
+import pytest
+
+from app.rbac_core import rbac
+from app.rbac_core.shared_snapshot import SharedSnapshot
+from app.rbac_core.versions import AuthzVersions
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    shared = SharedSnapshot(str(tmp_path / "authz.bin"), rbac.SUPER_ADMIN_ROLE)
+    # 不在后台重建，模拟重建尚未完成或失败
+    monkeypatch.setattr(shared, "schedule_publish", lambda: None)
+    monkeypatch.setattr(rbac, "shared_snapshot", shared)
+    return shared
+
+
+async def test_checks_use_current_snapshot(db, seed, snapshot):
+    await snapshot.publish(db)
+    view = await rbac._current_snapshot()
+    assert view is not None
+    assert view.has_name(seed["bob"].id, "user:list")
+    assert await rbac.check_user_permission_by_name(db, seed["bob"].id, "user:list")
+    assert await rbac.check_is_superadmin(db, seed["admin"].id)
+
+
+async def test_revoke_is_effective_before_snapshot_rebuild(db, seed, snapshot):
+    bob = seed["bob"]
+    await snapshot.publish(db)
+
+    bob.roles = []
+    await db.commit()
+    await rbac.invalidate_users([bob.id])
+
+    # 快照仍然记录着旧的授权，但已经落后于授权变更，不再使用
+    assert snapshot.current().has_name(bob.id, "user:list")
+    assert await rbac._current_snapshot() is None
+    assert not await rbac.check_user_permission_by_name(db, bob.id, "user:list")
+    assert not await rbac.check_user_permission_by_path_and_method(db, bob.id, "/rbac/users/", "GET")
+    assert await rbac.check_user_permissions(db, bob.id, ["user:list"], [("GET", "/rbac/users/")]) == ([False], [False])
+    assert await rbac.get_user_api_routes(db, bob.id) == (False, [])
+
+    # 新快照发布后重新使用快照
+    await snapshot.publish(db)
+    view = await rbac._current_snapshot()
+    assert view is not None and not view.has_name(bob.id, "user:list")
+
+
+async def test_remap_while_reading_serial(db, seed, snapshot, monkeypatch):
+    """
+    读取序号期间其他协程发布并映射了新快照，返回的快照不能是已经关闭的旧快照
+    """
+    await snapshot.publish(db)
+    old = snapshot.current()
+    serial = AuthzVersions.serial
+    remapped = []
+
+    async def serial_with_remap(self):
+        value = await serial(self)
+        if not remapped:
+            remapped.append(True)
+            await snapshot.publish(db)
+            snapshot.current()
+        return value
+
+    monkeypatch.setattr(AuthzVersions, "serial", serial_with_remap)
+    view = await rbac._current_snapshot()
+    assert view is not None and view is not old
+    assert view.has_name(seed["bob"].id, "user:list")
@@ -0,0 +1,73 @@
+import asyncio
+
+import anyio
+import pytest
+from sqlalchemy import delete, insert
+
+from app.core.database import AsyncSessionLocal
+from app.rbac_core import Department, rbac
+from app.rbac_core.associations import user_department, user_role
+
+pytestmark = pytest.mark.anyio
+
+
+def _hold_first_load(monkeypatch, name: str) -> tuple[asyncio.Event, asyncio.Event]:
+    """
+    第一次加载查询完数据库后暂停，直到 release 被设置，模拟变更发生时仍在进行的查询
+    """
+    original = getattr(rbac, name)
+    loaded, release = asyncio.Event(), asyncio.Event()
+
+    async def load(*args):
+        result = await original(*args)
+        if not loaded.is_set():
+            loaded.set()
+            await release.wait()
+        return result
+
+    monkeypatch.setattr(rbac, name, load)
+    return loaded, release
+
+
+async def _revoke_during_load(monkeypatch, loader: str, read, revoke) -> tuple:
+    loaded, release = _hold_first_load(monkeypatch, loader)
+    async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+        with anyio.fail_after(5):
+            before = asyncio.create_task(read(first))
+            await loaded.wait()
+            await revoke(second)
+            # 读到变更后版本号的请求不能拿到变更前开始的查询的结果，合并到暂停的查询时这里会超时
+            after = await read(second)
+            release.set()
+            return await before, after
+
+
+async def test_role_revoked_during_load(db, seed, monkeypatch):
+    bob = seed["bob"]
+
+    async def revoke(session):
+        await session.execute(delete(user_role).where(user_role.c.user_id == bob.id))
+        await session.commit()
+        await rbac.invalidate_users([bob.id])
+
+    before, after = await _revoke_during_load(monkeypatch, "_load_user_roles", lambda s: rbac.get_user_role_ids(s, bob.id), revoke)
+    assert before == (seed["viewer"].id,)
+    assert after == ()
+    assert not await rbac.check_user_permission_by_name(db, bob.id, "user:list")
+
+
+async def test_department_removed_during_load(db, seed, monkeypatch):
+    bob = seed["bob"]
+    db.add(Department(id=1, name="sales", path="/1/"))
+    await db.execute(insert(user_department).values(user_id=bob.id, department_id=1))
+    await db.commit()
+
+    async def revoke(session):
+        await session.execute(delete(user_department).where(user_department.c.user_id == bob.id))
+        await session.commit()
+        await rbac.invalidate_users([bob.id])
+
+    before, after = await _revoke_during_load(monkeypatch, "_load_user_departments", lambda s: rbac.get_user_department_paths(s, bob.id), revoke)
+    assert before == ("/1/",)
+    assert after == ()
+    assert await rbac.get_user_department_paths(db, bob.id) == ()
@@ -0,0 +1,82 @@
+import copy
+import json
+
+from app.core.tree import build_tree, iter_tree_json, prune_tree
+
+# 远超默认递归深度限制
+DEEP = 10_000
+
+
+def _chain(depth: int) -> list[dict]:
+    return [{"id": i, "parent_id": i - 1 if i else None, "name": f"n{i}"} for i in range(depth)]
+
+
+def _dumps(roots, **kwargs) -> str:
+    return b"".join(iter_tree_json(roots, **kwargs)).decode()
+
+
+def test_empty_tree():
+    assert build_tree([]) == []
+    assert prune_tree([], lambda node: True) == []
+    assert _dumps([]) == "[]"
+
+
+def test_build_and_serialize():
+    rows = [
+        {"id": 1, "parent_id": None, "name": "root", "sort": 2},
+        {"id": 2, "parent_id": 1, "name": "b", "sort": 2},
+        {"id": 3, "parent_id": 1, "name": "a", "sort": 1},
+        {"id": 4, "parent_id": 99, "name": "orphan", "sort": 0},
+        {"id": 5, "parent_id": None, "name": "other", "sort": 1},
+    ]
+    roots = build_tree(rows, sort_key="sort")
+    assert [node["id"] for node in roots] == [5, 1]
+    assert [node["id"] for node in roots[1]["children"]] == [3, 2]
+    # 小块输出拼接后仍是同一份 JSON
+    assert json.loads(_dumps(roots, chunk_size=8, exclude=frozenset({"sort"}))) == [
+        {"id": 5, "name": "other"},
+        {"id": 1, "name": "root", "children": [{"id": 3, "parent_id": 1, "name": "a"}, {"id": 2, "parent_id": 1, "name": "b"}]},
+    ]
+
+
+def test_exclude_none():
+    roots = [{"id": 1, "parent_id": None}]
+    assert json.loads(_dumps(roots)) == [{"id": 1}]
+    assert json.loads(_dumps(roots, exclude_none=False)) == [{"id": 1, "parent_id": None}]
+
+
+def test_prune_keeps_original():
+    rows = [
+        {"id": 1, "parent_id": None, "dir": True},
+        {"id": 2, "parent_id": 1, "dir": True},
+        {"id": 3, "parent_id": 2, "dir": False, "hidden": True},
+        {"id": 4, "parent_id": 1, "dir": False},
+        {"id": 5, "parent_id": None, "dir": True},
+    ]
+    roots = build_tree(rows)
+    before = copy.deepcopy(roots)
+
+    pruned = prune_tree(roots, lambda node: not node.get("hidden"), drop_empty=lambda node: node["dir"])
+    assert pruned == [{"id": 1, "parent_id": None, "dir": True, "children": [{"id": 4, "parent_id": 1, "dir": False}]}]
+    assert prune_tree(roots, lambda node: node["id"] != 1) == [{"id": 5, "parent_id": None, "dir": True}]
+    assert roots == before
+
+
+def test_deep_tree():
+    roots = build_tree(_chain(DEEP))
+    pruned = prune_tree(roots, lambda node: node["id"] < DEEP - 1)
+
+    depth, node = 1, pruned[0]
+    while "children" in node:
+        (node,) = node["children"]
+        depth += 1
+    assert depth == DEEP - 1
+
+    fields = ['{"id":%d,"name":"n%d"' % (i, i) for i in range(DEEP)]
+    expected = "[" + ',"children":['.join(fields) + "}" + "]}" * (DEEP - 1) + "]"
+    assert _dumps(roots, exclude=frozenset({"parent_id"}), chunk_size=1024) == expected
+
+
+def test_moderate_depth_round_trip():
+    roots = build_tree(_chain(200))
+    assert json.loads(_dumps(roots, chunk_size=16, exclude_none=False)) == json.loads(json.dumps(roots))